@@ -1,40 +1,65 @@
 # app.py — full backend (Auth + Obj1 + Obj2 + Obj3 + Obj4)
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, make_response, request
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3, os, traceback, joblib
+import sqlite3, os, traceback, joblib, csv, io, json, threading, time, hashlib, hmac, functools
+import numpy as np
 import pandas as pd
 
 # -------- Optional weather import (safe fallback if utils/weather.py not present) --------
 try:
     # expects: get_weather(city, api_key) -> (temp_c, humidity)
-    from utils.weather import get_weather  # type: ignore
+    #          get_weather_bulk(cities, api_key) -> [{"city", "temperature", "humidity", "status"}]
+    from utils.weather import get_weather, get_weather_bulk  # type: ignore
 except Exception:
     def get_weather(*args, **kwargs):
         return None, None
 
+    def get_weather_bulk(cities, *args, **kwargs):
+        return [{"city": c, "temperature": None, "humidity": None, "status": "unavailable"} for c in cities]
+
 # -------- Cycle planning helpers (Objective 2) --------
 from utils.cycle_data import (
     get_next_crop, ROTATION_ALTS, CROP_GUIDE, make_12_week_plan,
     YIELD_AVG_QTL_HA, NPK_BALANCE, get_crop_tips, get_season_info, normalize_state
 )
+from utils.yield_cube import YieldCube
+from utils.yield_forecast import YieldForecast
+from utils.yield_store import SQLiteYieldCube, SQLiteYieldForecast, build_yield_db
+from utils.region_index import RegionIndex
+from utils.json_provider import FastJSONProvider
+from utils.compression import etag_matches, init_compression
+from utils.dataset_cache import load_frame_snapshot, save_frame_snapshot
+from utils.db_pool import create_pool
+from utils.price_index import PriceIndex, canonical_crop, read_price_reference
+from utils.profit_risk import simulate_profit
+from utils.password_hashing import PasswordPoolBusy, hash_password, needs_rehash, verify_password
+from utils.session_tokens import TokenError, get_signer
+from utils.fast_forest import compile_forest, load_forest, read_forest_meta, save_forest, source_fingerprint
 
 # ======================== Paths & App ========================
 BASE_DIR = os.path.dirname(__file__)
-DB_PATH = os.path.join(BASE_DIR, "users.db")
+# CROPFIT_DB_PATH / CROPFIT_DISTRICT_CSV / CROPFIT_PRICE_CSV point a process at other
+# files, e.g. the scratch DB and scaled synthetic datasets of benchmarks/bench_api.py
+DB_PATH = os.environ.get("CROPFIT_DB_PATH") or os.path.join(BASE_DIR, "users.db")
 MODEL_PATH = os.path.join(BASE_DIR, "models", "crop_model.pkl")
 FEATURES_PATH = os.path.join(BASE_DIR, "models", "feature_order.pkl")
+# Flat-array export of crop_model.pkl, memory-mapped and shared by all workers on a host
+FOREST_PATH = os.path.join(BASE_DIR, "models", "crop_model.forest")
+MODEL_MMAP = os.environ.get("CROPFIT_MODEL_MMAP", "1") != "0"
 
 # Objective 3/4 datasets
-DISTRICT_CSV_PATH = os.path.join(BASE_DIR, "data", "district_crop_yield.csv")
-PRICE_COST_CSV_PATH = os.path.join(BASE_DIR, "data", "price_cost_reference.csv")
-
-# Lazy caches
-_DISTRICT_DF = None
-_PRICE_DF = None
+DISTRICT_CSV_PATH = os.environ.get("CROPFIT_DISTRICT_CSV") or os.path.join(BASE_DIR, "data", "district_crop_yield.csv")
+PRICE_COST_CSV_PATH = os.environ.get("CROPFIT_PRICE_CSV") or os.path.join(BASE_DIR, "data", "price_cost_reference.csv")
+# Where district yields are queried from: "memory" (pandas, utils/yield_cube.py) or
+# "sqlite" (indexed on-disk DB built from the CSV, utils/yield_store.py) for datasets
+# too large to hold in every worker
+YIELD_BACKEND = os.environ.get("CROPFIT_YIELD_BACKEND", "memory").strip().lower()
+YIELD_DB_PATH = os.environ.get("CROPFIT_YIELD_DB") or os.path.splitext(DISTRICT_CSV_PATH)[0] + ".sqlite"
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed; NumPy values serialize as-is
+COMPRESSOR = init_compression(app)  # gzip/br by Accept-Encoding
 
 # Allow your Vite dev origins, methods, and headers explicitly
 CORS(
@@ -43,7 +68,7 @@ CORS(
         r"/api/*": {
             "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
             "methods": ["GET", "POST", "OPTIONS"],
-            "allow_headers": ["Content-Type"],
+            "allow_headers": ["Content-Type", "Authorization"],
         }
     },
 )
@@ -53,34 +78,33 @@ def add_cors_headers(resp):
     origin = request.headers.get("Origin", "")
     if origin in ("http://localhost:5173", "http://127.0.0.1:5173"):
         resp.headers["Access-Control-Allow-Origin"] = origin
-        resp.headers["Vary"] = "Origin"
+        resp.vary.add("Origin")  # keep http_cached's Vary: Authorization
         resp.headers["Access-Control-Allow-Methods"] = "GET,POST,OPTIONS"
-        resp.headers["Access-Control-Allow-Headers"] = "Content-Type"
+        resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
     return resp
 
 print("✅ Loaded app.py from:", __file__)
 
 # ======================== Load ML model for Obj1 ========================
-CROP_MODEL = None
-FEATURE_ORDER = None
-if os.path.exists(MODEL_PATH) and os.path.exists(FEATURES_PATH):
+EXPECTED_FEATURES = {"N", "P", "K", "temperature", "humidity", "ph", "rainfall"}
+
+def _load_model():
+    """Load (model, feature_order) from disk; (None, None) means use fallback rules."""
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(FEATURES_PATH)):
+        print("⚠️ Model or feature file not found. Using fallback rules for prediction.")
+        return None, None
     try:
-        CROP_MODEL = joblib.load(MODEL_PATH)
-        FEATURE_ORDER = joblib.load(FEATURES_PATH)
-        print("✅ Loaded crop model with features:", FEATURE_ORDER)
+        model = joblib.load(MODEL_PATH)
+        feature_order = joblib.load(FEATURES_PATH)
+        print("✅ Loaded crop model with features:", feature_order)
+        return model, feature_order
     except Exception as e:
         print("⚠️ Could not load model:", e)
-else:
-    print("⚠️ Model or feature file not found. Using fallback rules for prediction.")
+        return None, None
 
 # ======================== DB (Auth) ========================
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def init_db():
-    conn = get_db()
+def init_db(conn):
+    """Create the auth schema; run by the pool on a process's first connection."""
     conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -90,21 +114,45 @@ def init_db():
         )
     """)
     conn.commit()
-    conn.close()
 
-init_db()
+_DB_POOL = create_pool(DB_PATH, init_schema=init_db)
+
+def get_db():
+    """This thread's pooled connection (WAL); do not close it."""
+    return _DB_POOL.connection()
+
+@app.teardown_appcontext
+def release_db(exc):
+    _DB_POOL.release()
 
 # ======================== Helpers: Datasets (Obj3/Obj4) ========================
 def _load_district_df():
-    """Load & cache district crop yield dataset."""
-    global _DISTRICT_DF
-    if _DISTRICT_DF is not None:
-        return _DISTRICT_DF
+    """Load the cleaned district crop yield dataset (binary snapshot, else CSV)."""
     if not os.path.exists(DISTRICT_CSV_PATH):
         print(f"⚠️ district_crop_yield.csv not found at {DISTRICT_CSV_PATH}")
         return None
 
-    df = pd.read_csv(DISTRICT_CSV_PATH)
+    df = None
+    try:
+        df = load_frame_snapshot(DISTRICT_CSV_PATH)
+    except Exception as e:
+        print("⚠️ Ignoring unreadable district snapshot:", e)
+    if df is None:
+        df = _read_district_csv()
+        try:
+            save_frame_snapshot(df, DISTRICT_CSV_PATH)
+        except Exception as e:
+            print("⚠️ Could not write district snapshot:", e)
+
+    print(f"✅ Loaded district data: {len(df)} rows, states={df['State'].nunique()}, districts={df['District'].nunique()}")
+    return df
+
+def _read_district_csv():
+    """Parse & clean district_crop_yield.csv (the slow path behind the snapshot)."""
+    return _clean_district_frame(pd.read_csv(DISTRICT_CSV_PATH))
+
+def _clean_district_frame(df):
+    """Row-wise cleaning of raw district rows; also applied per chunk by the sqlite backend."""
     # Normalize headers if needed
     df.columns = [c.strip() for c in df.columns]
     rename_map = {
@@ -137,32 +185,30 @@ def _load_district_df():
 
     df = df[(df.get("Area_ha", 0) > 0)]
     df = df.dropna(subset=["Yield_q_per_ha"])
-    _DISTRICT_DF = df
-    print(f"✅ Loaded district data: {len(df)} rows, states={df['State'].nunique()}, districts={df['District'].nunique()}")
-    return _DISTRICT_DF
+    return df.reset_index(drop=True)
+
+def _open_yield_db():
+    """SQLiteYieldCube over YIELD_DB_PATH, (re)built from the CSV when it has changed."""
+    if not os.path.exists(DISTRICT_CSV_PATH):
+        if not os.path.exists(YIELD_DB_PATH):
+            print(f"⚠️ district_crop_yield.csv not found at {DISTRICT_CSV_PATH}")
+            return None
+    elif build_yield_db(DISTRICT_CSV_PATH, YIELD_DB_PATH, _clean_district_frame):
+        print(f"✅ Built yield DB {YIELD_DB_PATH}")
+    cube = SQLiteYieldCube(YIELD_DB_PATH)
+    print(f"✅ Opened yield DB: {cube.size} rows, states={len(cube.states)}, "
+          f"districts={sum(len(d) for d in cube.districts.values())}")
+    return cube
 
 def _load_price_df():
-    """Load & cache price/cost references."""
-    global _PRICE_DF
-    if _PRICE_DF is not None:
-        return _PRICE_DF
+    """Load price/cost references (None if the CSV is missing); see utils/price_index.py."""
     if not os.path.exists(PRICE_COST_CSV_PATH):
         print(f"⚠️ price_cost_reference.csv not found at {PRICE_COST_CSV_PATH}. Will use internal fallbacks.")
-        _PRICE_DF = None
         return None
-    df = pd.read_csv(PRICE_COST_CSV_PATH)
-    df.columns = [c.strip() for c in df.columns]
-    # expected: Crop, price_rs_per_quintal, cost_rs_per_hectare
-    # normalize crop
-    if "Crop" in df.columns:
-        df["Crop"] = df["Crop"].astype(str).str.strip().str.lower()
-    # coerce numbers
-    for col in ["price_rs_per_quintal", "cost_rs_per_hectare"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    _PRICE_DF = df
-    print(f"✅ Loaded price/cost reference: {len(df)} crops")
-    return _PRICE_DF
+    df = read_price_reference(PRICE_COST_CSV_PATH)
+    print(f"✅ Loaded price/cost reference: {len(df)} crops "
+          f"({int(df['price_rs_per_quintal'].notna().sum())} with a price)")
+    return df
 
 # simple internal fallbacks if CSV missing
 _PRICE_FALLBACK = {
@@ -181,33 +227,416 @@ _PRICE_FALLBACK = {
     "groundnut": (5500, 60000),
 }
 
-def _lookup_price_cost(crop_lower: str):
-    """Return (price_rs_per_quintal, cost_rs_per_hectare, note)"""
-    df = _load_price_df()
-    if df is not None and {"Crop", "price_rs_per_quintal", "cost_rs_per_hectare"}.issubset(df.columns):
-        row = df[df["Crop"] == crop_lower].head(1)
-        if not row.empty:
-            p = row["price_rs_per_quintal"].iloc[0]
-            c = row["cost_rs_per_hectare"].iloc[0]
-            if pd.notna(p) and pd.notna(c):
-                return float(p), float(c), "From price_cost_reference.csv"
-    # fallback
-    if crop_lower in _PRICE_FALLBACK:
-        p, c = _PRICE_FALLBACK[crop_lower]
-        return float(p), float(c), "Fallback internal reference (demo)"
-    # last resort defaults
-    return 2500.0, 50000.0, "Generic defaults (demo)"
+# ======================== Data snapshot & hot reload ========================
+# Everything request handlers read (model + Obj3/Obj4 datasets + derived
+# indexes) lives in one DataSnapshot. A reload builds a complete new snapshot
+# off the request path, validates it, then swaps the module reference in one
+# assignment. Handlers grab the reference once per request via
+# _current_snapshot(), so in-flight requests finish on the generation they began with.
+
+class DataSnapshot:
+    """Immutable bundle of loaded data; never mutate after construction."""
+
+    __slots__ = ("version", "generation", "loaded_at", "last_modified", "timings_ms",
+                 "model", "predictor", "feature_order", "district_df", "yield_cube", "yield_forecast", "region_index", "price_df", "price_index")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DataSnapshot is immutable")
+
+_SNAPSHOT = None
+_GENERATION = 0
+_DATA_LOCK = threading.Lock()    # single-flight first load
+_RELOAD_LOCK = threading.Lock()  # one reload build at a time
+
+def _sources_version():
+    """Short content-derived tag of the model/CSV files backing a snapshot."""
+    h = hashlib.sha1()
+    for path in (MODEL_PATH, FEATURES_PATH, DISTRICT_CSV_PATH, PRICE_COST_CSV_PATH):
+        try:
+            st = os.stat(path)
+            h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{os.path.basename(path)}:missing;".encode())
+    return h.hexdigest()[:12]
+
+def _sources_mtime():
+    """Newest modification time (unix seconds) of the files backing a snapshot."""
+    mtimes = []
+    for path in (MODEL_PATH, FEATURES_PATH, DISTRICT_CSV_PATH, PRICE_COST_CSV_PATH):
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            pass
+    return int(max(mtimes)) if mtimes else None
+
+def _compile_predictor(model, feature_order):
+    """
+    Flat-array predictor for the model (see utils/fast_forest.py), or the model
+    itself if it can't be compiled or disagrees with model.predict on probe rows.
+    """
+    if model is None or feature_order is None:
+        return model
+    compiled = compile_forest(model)
+    if compiled is None:
+        return model
+    probe = np.random.default_rng(0).uniform(0, 300, size=(64, len(feature_order)))
+    if not np.array_equal(compiled.predict(probe), model.predict(probe)):
+        print("⚠️ Compiled forest disagrees with model.predict; using sklearn predict")
+        return model
+    return compiled
+
+def _load_predictor():
+    """
+    Return (model, predictor, feature_order).
+
+    With MODEL_MMAP (default) the predictor is the flat forest in FOREST_PATH,
+    memory-mapped read-only so every worker shares one copy of the tree arrays.
+    It is (re)exported from crop_model.pkl when missing or stale. model is then
+    None: no worker keeps a private copy of the sklearn trees.
+    """
+    if not MODEL_MMAP:
+        model, feature_order = _load_model()
+        return model, _compile_predictor(model, feature_order), feature_order
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(FEATURES_PATH)):
+        print("⚠️ Model or feature file not found. Using fallback rules for prediction.")
+        return None, None, None
+
+    fingerprint = source_fingerprint(MODEL_PATH)
+    meta = read_forest_meta(FOREST_PATH)
+    if meta is None or meta.get("source") != fingerprint:
+        model, feature_order = _load_model()
+        predictor = _compile_predictor(model, feature_order)
+        if predictor is model:
+            return model, predictor, feature_order  # not a compilable forest: serve sklearn
+        try:
+            save_forest(predictor, FOREST_PATH, source=fingerprint)
+            print("✅ Exported flat forest to", FOREST_PATH)
+        except Exception as e:
+            print("⚠️ Could not export flat forest:", e)
+            return model, predictor, feature_order
+        del model, predictor
+
+    try:
+        predictor = load_forest(FOREST_PATH, mmap=True)
+        feature_order = joblib.load(FEATURES_PATH)
+        print(f"✅ Memory-mapped crop model ({predictor.n_trees} trees) with features:", feature_order)
+        return None, predictor, feature_order
+    except Exception as e:
+        print("⚠️ Could not map flat forest, loading pickle:", e)
+        model, feature_order = _load_model()
+        return model, _compile_predictor(model, feature_order), feature_order
+
+def _build_snapshot():
+    """Load every component from disk into a new (unpublished) DataSnapshot."""
+    global _GENERATION
+    version = _sources_version()
+    timings = {}
+
+    def timed(name, fn):
+        t0 = time.perf_counter()
+        out = fn()
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+        return out
+
+    model, predictor, feature_order = timed("model", _load_predictor)
+    if YIELD_BACKEND == "sqlite":
+        # rows stay on disk; only the region lists are held in memory
+        district_df = None
+        yield_cube = timed("yield_cube", _open_yield_db)
+        yield_forecast = SQLiteYieldForecast(yield_cube) if yield_cube is not None else None
+    else:
+        district_df = timed("district_data", _load_district_df)
+        yield_cube = timed("yield_cube", lambda: YieldCube(district_df) if district_df is not None else None)
+        yield_forecast = timed("yield_forecast", lambda: YieldForecast(district_df) if district_df is not None else None)
+    region_index = timed("region_index", lambda: RegionIndex(yield_cube.districts) if yield_cube is not None else None)
+    price_df = timed("price_data", _load_price_df)
+    price_index = timed("price_index", lambda: PriceIndex(price_df, _PRICE_FALLBACK))
+
+    _GENERATION += 1
+    return DataSnapshot(
+        version=version,
+        generation=_GENERATION,
+        loaded_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        last_modified=_sources_mtime(),
+        timings_ms=timings,
+        model=model,
+        predictor=predictor,
+        feature_order=feature_order,
+        district_df=district_df,
+        yield_cube=yield_cube,
+        yield_forecast=yield_forecast,
+        region_index=region_index,
+        price_df=price_df,
+        price_index=price_index,
+    )
+
+def _validate_snapshot(snap, previous=None):
+    """Return a list of problems; empty means the snapshot is safe to publish."""
+    problems = []
+    if snap.predictor is not None:
+        if set(snap.feature_order or []) != EXPECTED_FEATURES:
+            problems.append(f"feature_order {snap.feature_order} does not match {sorted(EXPECTED_FEATURES)}")
+        else:
+            try:
+                snap.predictor.predict(np.zeros((1, len(snap.feature_order))))
+            except Exception as e:
+                problems.append(f"model smoke prediction failed: {e}")
+    if snap.district_df is not None:
+        missing = {"State", "District", "Season", "Crop", "Yield_q_per_ha"} - set(snap.district_df.columns)
+        if missing:
+            problems.append(f"district data missing columns {sorted(missing)}")
+        elif snap.district_df.empty:
+            problems.append("district data has no usable rows")
+    elif snap.yield_cube is not None and not snap.yield_cube.states:
+        problems.append("district data has no usable rows")
+    if previous is not None:
+        # a reload must not silently drop a component that is currently served
+        for name in ("predictor", "yield_cube", "price_df"):
+            if getattr(previous, name) is not None and getattr(snap, name) is None:
+                problems.append(f"{name} could not be loaded")
+    return problems
+
+def _current_snapshot():
+    """The live snapshot (loading it on first use); pinned to flask.g for this request."""
+    global _SNAPSHOT
+    if has_request_context():
+        pinned = g.get("data_snapshot")
+        if pinned is not None:
+            return pinned
+    snap = _SNAPSHOT
+    if snap is None:
+        with _DATA_LOCK:
+            if _SNAPSHOT is None:
+                _SNAPSHOT = _build_snapshot()
+            snap = _SNAPSHOT
+    if has_request_context():
+        g.data_snapshot = snap
+    return snap
+
+def reload_data():
+    """
+    Build, validate and atomically publish a new snapshot.
+    Returns (ok, info) where info carries version, generation and timings.
+    """
+    global _SNAPSHOT
+    with _RELOAD_LOCK:
+        # compare against the live snapshot, not the one pinned to this request
+        previous = _SNAPSHOT if _SNAPSHOT is not None else _current_snapshot()
+        t0 = time.perf_counter()
+        try:
+            snap = _build_snapshot()
+        except Exception as e:
+            traceback.print_exc()
+            return False, {"error": f"reload failed: {e}", "version": previous.version}
+        problems = _validate_snapshot(snap, previous)
+        info = {
+            "previous_version": previous.version,
+            "previous_generation": previous.generation,
+            "timings_ms": dict(snap.timings_ms, total=round((time.perf_counter() - t0) * 1000, 1)),
+        }
+        if problems:
+            info.update(version=previous.version, generation=previous.generation, problems=problems)
+            print("⚠️ Reload rejected:", problems)
+            return False, info
+        _SNAPSHOT = snap  # the atomic switch
+        info.update(version=snap.version, generation=snap.generation, loaded_at=snap.loaded_at)
+        print(f"✅ Reloaded data: version={snap.version} generation={snap.generation}")
+        return True, info
+
+def _watch_sources(interval_s):
+    """Poll source files and reload when their version tag changes."""
+    while True:
+        time.sleep(interval_s)
+        snap = _SNAPSHOT
+        if snap is not None and _sources_version() != snap.version:
+            reload_data()
+
+def start_source_watcher():
+    """Enable with CROPFIT_RELOAD_WATCH_SECS=<seconds>; off by default."""
+    interval_s = float(os.environ.get("CROPFIT_RELOAD_WATCH_SECS", "0") or 0)
+    if interval_s > 0:
+        threading.Thread(target=_watch_sources, args=(interval_s,),
+                         name="cropfit-watcher", daemon=True).start()
+
+@app.after_request
+def add_data_version_headers(resp):
+    snap = g.get("data_snapshot")
+    if snap is not None:
+        resp.headers["X-Data-Version"] = snap.version
+        resp.headers["X-Data-Generation"] = str(snap.generation)
+    return resp
+
+# ======================== HTTP caching ========================
+# Region lists and cycle plans only change when their source data does, so
+# they carry a strong ETag built from that data's version plus the
+# normalized inputs. A conditional GET that still matches is answered 304
+# before the view runs: no lookup, no JSON body.
+CACHE_MAX_AGE_S = int(os.environ.get("CROPFIT_CACHE_MAX_AGE_S", "300") or 0)
+
+def _file_version(path):
+    st = os.stat(path)
+    return hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:12], int(st.st_mtime)
+
+# cycle plans come from the rotation rules in utils/cycle_data.py, not from the snapshot
+_RULES_VERSION = _file_version(os.path.join(BASE_DIR, "utils", "cycle_data.py"))
+
+def _data_version():
+    snap = _current_snapshot()
+    return snap.version, snap.last_modified
+
+def _not_modified(etag, last_modified):
+    """The ETag to answer 304 with (a compressed variant if that's what the client holds), else None."""
+    if request.if_none_match:
+        return etag_matches(request.if_none_match, etag)
+    since = request.if_modified_since
+    return etag if since and last_modified and last_modified <= since.timestamp() else None
+
+def http_cached(key_fn=None, version_fn=_data_version, private=False):
+    """
+    ETag / Last-Modified / Cache-Control for a deterministic view.
+    key_fn() returns the normalized inputs (default: the query string);
+    version_fn() returns (version, last_modified) of the data behind the view.
+    private=True is for views behind @token_auth.
+    Only GET/HEAD are cached; other methods (POST bodies) go straight to the view,
+    so key_fn never has to parse a body the view itself would reject.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return fn(*args, **kwargs)
+            version, last_modified = version_fn()
+            key = key_fn() if key_fn else sorted(request.args.items(multi=True))
+            etag = hashlib.sha1(json.dumps([version, request.path, key], default=str).encode()).hexdigest()[:20]
+            held = _not_modified(etag, last_modified)
+            if held:
+                resp = app.response_class(status=304)
+                etag = held
+            else:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            if last_modified:
+                resp.last_modified = last_modified
+            resp.headers["Cache-Control"] = f"{'private' if private else 'public'}, max-age={CACHE_MAX_AGE_S}"
+            if private:
+                resp.vary.add("Authorization")
+            return resp
+        return wrapper
+    return decorator
+
+# ======================== Warm-up & readiness ========================
+# Builds the first snapshot in the background right after import. Requests
+# that arrive earlier simply block on _DATA_LOCK until that load finishes.
+_WARMUP = {"started": False, "done": False, "error": None}
+_READY = threading.Event()
+
+def warm_up():
+    """Load everything the request path needs; safe to call more than once."""
+    try:
+        _current_snapshot()
+        _WARMUP["done"] = True
+        _READY.set()
+    except Exception as e:
+        traceback.print_exc()
+        _WARMUP["error"] = str(e)
+
+def start_warm_up():
+    """Kick off warm_up() on a daemon thread (once per process)."""
+    with _RELOAD_LOCK:
+        if _WARMUP["started"]:
+            return
+        _WARMUP["started"] = True
+    threading.Thread(target=warm_up, name="cropfit-warmup", daemon=True).start()
 
 # ======================== Health/Utils ========================
 @app.route("/api/ping")
 def ping():
     return jsonify({"ok": True, "message": "pong"})
 
+@app.route("/api/ready")
+def ready():
+    """Readiness probe: 200 once caches are hot, 503 while warming up (or if warm-up failed)."""
+    snap = _SNAPSHOT
+    body = {
+        "ok": _READY.is_set(),
+        "ready": _READY.is_set(),
+        "error": _WARMUP["error"],
+        "version": snap.version if snap else None,
+        "generation": snap.generation if snap else None,
+        "loaded_at": snap.loaded_at if snap else None,
+        "timings_ms": snap.timings_ms if snap else {},
+        "components": {
+            "model": snap is not None and snap.predictor is not None,
+            "compiled_model": snap is not None and snap.predictor is not None and snap.predictor is not snap.model,
+            "model_mmap": snap is not None and snap.predictor is not None and snap.model is None,
+            "district_data": snap is not None and snap.yield_cube is not None,
+            "yield_backend": YIELD_BACKEND,
+            "price_data": snap is not None and snap.price_df is not None,
+        },
+    }
+    return jsonify(body), (200 if _READY.is_set() else 503)
+
+@app.route("/api/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Rebuild model + datasets and swap them in without a restart.
+    Requires header X-Admin-Token matching env CROPFIT_ADMIN_TOKEN (disabled if unset).
+    """
+    expected = os.environ.get("CROPFIT_ADMIN_TOKEN", "")
+    if not expected:
+        return jsonify({"ok": False, "error": "admin reload disabled (CROPFIT_ADMIN_TOKEN not set)"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), expected):
+        return jsonify({"ok": False, "error": "invalid admin token"}), 403
+    ok, info = reload_data()
+    return jsonify({"ok": ok, **info}), (200 if ok else 409)
+
 @app.route("/api/routes")
 def routes():
     return jsonify(sorted([r.rule for r in app.url_map.iter_rules()]))
 
 # ======================== Auth APIs ========================
+# Hashing runs on a bounded process pool (utils/password_hashing.py); a full
+# queue answers 503 straight away instead of stalling this worker.
+def _hash_busy_response(e):
+    resp = jsonify({"ok": False, "error": f"Server busy, please retry ({e})"})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
+# Login issues a signed, expiring token (utils/session_tokens.py). Endpoints
+# wrapped in @token_auth check it without touching SQLite or the hash pool.
+# CROPFIT_REQUIRE_AUTH=1 makes the token mandatory; otherwise anonymous calls
+# still work and a valid token just sets g.user.
+REQUIRE_AUTH = os.environ.get("CROPFIT_REQUIRE_AUTH", "0") == "1"
+
+def _bearer_token():
+    header = request.headers.get("Authorization", "")
+    return header[7:].strip() if header[:7].lower() == "bearer " else ""
+
+def token_auth(fn=None, required=None):
+    """Set g.user from a Bearer token; 401 for a bad token, or a missing one when required."""
+    if fn is None:
+        return functools.partial(token_auth, required=required)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.user = None
+        token = _bearer_token()
+        if token:
+            try:
+                g.user = get_signer().verify(token)
+            except TokenError as e:
+                return jsonify({"ok": False, "error": str(e)}), 401
+        elif REQUIRE_AUTH if required is None else required:
+            return jsonify({"ok": False, "error": "authentication required"}), 401
+        return fn(*args, **kwargs)
+    return wrapper
+
 @app.route("/api/register", methods=["POST"])
 def register():
     try:
@@ -218,18 +647,19 @@ def register():
         if not name or not email or not password:
             return jsonify({"ok": False, "error": "name, email, password required"}), 400
 
-        pwd_hash = generate_password_hash(password)
+        try:
+            pwd_hash = hash_password(password)
+        except PasswordPoolBusy as e:
+            return _hash_busy_response(e)
         conn = get_db()
         try:
-            conn.execute(
-                "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
-                (name, email, pwd_hash),
-            )
-            conn.commit()
+            with conn:  # commit, or roll back on error
+                conn.execute(
+                    "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+                    (name, email, pwd_hash),
+                )
         except sqlite3.IntegrityError:
             return jsonify({"ok": False, "error": "Email already registered"}), 409
-        finally:
-            conn.close()
 
         return jsonify({"ok": True, "user": {"name": name, "email": email}})
     except Exception as e:
@@ -245,129 +675,318 @@ def login():
         if not email or not password:
             return jsonify({"ok": False, "error": "email and password required"}), 400
 
-        conn = get_db()
-        row = conn.execute(
+        row = get_db().execute(
             "SELECT id, name, email, password_hash FROM users WHERE email = ?",
             (email,),
         ).fetchone()
-        conn.close()
 
         if not row:
             return jsonify({"ok": False, "error": "User not found"}), 404
-        if not check_password_hash(row["password_hash"], password):
+        try:
+            valid = verify_password(row["password_hash"], password)
+        except PasswordPoolBusy as e:
+            return _hash_busy_response(e)
+        if not valid:
             return jsonify({"ok": False, "error": "Invalid password"}), 401
 
-        return jsonify({"ok": True, "user": {"name": row["name"], "email": row["email"]}})
+        if needs_rehash(row["password_hash"]):
+            # cost parameters changed since this hash was made: upgrade it now
+            try:
+                with get_db() as conn:
+                    conn.execute("UPDATE users SET password_hash = ? WHERE id = ?",
+                                 (hash_password(password), row["id"]))
+            except PasswordPoolBusy:
+                pass  # try again on a later login
+
+        token, expires_at = get_signer().issue(row["id"], row["email"], row["name"])
+        return jsonify({
+            "ok": True,
+            "user": {"name": row["name"], "email": row["email"]},
+            "token": token,
+            "token_type": "Bearer",
+            "expires_at": expires_at,
+        })
     except Exception as e:
         traceback.print_exc()
         return jsonify({"ok": False, "error": str(e)}), 500
 
+@app.route("/api/logout", methods=["POST"])
+@token_auth(required=True)
+def logout():
+    if not get_signer().revoke(g.user):
+        return jsonify({"ok": False, "error": "Logout unavailable right now, try again later"}), 503
+    return jsonify({"ok": True})
+
 # ======================== Objective 1: Predict Crop ========================
-@app.route("/api/predict-crop", methods=["POST"])
-def predict_crop():
-    def to_float(x, default=None):
-        try:
-            if x is None:
-                return default
-            if isinstance(x, (int, float)):
-                return float(x)
-            x = str(x).strip()
-            if x == "":
-                return default
+MAX_BATCH_SAMPLES = 10000
+
+def to_float(x, default=None):
+    try:
+        if x is None:
+            return default
+        if isinstance(x, (int, float)):
             return float(x)
-        except Exception:
+        x = str(x).strip()
+        if x == "":
             return default
+        return float(x)
+    except Exception:
+        return default
+
+def _parse_soil_sample(data):
+    """Apply the /api/predict-crop defaults to one raw sample dict."""
+    return {
+        "N": to_float(data.get("N"), 0.0),
+        "P": to_float(data.get("P"), 0.0),
+        "K": to_float(data.get("K"), 0.0),
+        "ph": to_float(data.get("ph"), 7.0),
+        "rainfall": to_float(data.get("rainfall"), 0.0),
+        "city": (data.get("city") or "").strip(),
+        "temperature": to_float(data.get("temperature"), None),
+        "humidity": to_float(data.get("humidity"), None),
+    }
 
+def _fill_weather(sample, weather_cache=None):
+    """
+    Fill missing temperature/humidity from the weather API (never crash),
+    then apply the 25 °C / 60 % defaults. Mutates and returns the sample.
+    weather_cache (dict) lets a batch fetch each city only once.
+    """
+    used_weather_api = False
+    try:
+        api_key = os.environ.get("OPENWEATHER_API_KEY", "")
+        city = sample["city"]
+        city_key = " ".join(city.lower().split())
+        if (sample["temperature"] is None or sample["humidity"] is None) and city and api_key:
+            if weather_cache is not None and city_key in weather_cache:
+                t, h = weather_cache[city_key]
+            else:
+                t, h = get_weather(city, api_key)
+                if weather_cache is not None:
+                    weather_cache[city_key] = (t, h)
+            if t is not None and h is not None:
+                sample["temperature"], sample["humidity"] = float(t), float(h)
+                used_weather_api = True
+    except Exception:
+        pass
+
+    if sample["temperature"] is None: sample["temperature"] = 25.0
+    if sample["humidity"] is None: sample["humidity"] = 60.0
+    sample["used_weather_api"] = used_weather_api
+    return sample
+
+def _rule_based_crop(N, ph, rainfall):
+    if rainfall > 200 and 6.0 <= ph <= 7.5:
+        return "rice"
+    elif rainfall < 80 and 6.0 <= ph <= 7.8:
+        return "wheat"
+    elif ph is not None and ph < 5.8:
+        return "tea"
+    elif (ph is not None and ph > 7.8) and (N is not None and N < 50):
+        return "millets"
+    return "maize"
+
+# Order used to rank the remaining rule-based crops after the matched one.
+_FALLBACK_CROPS = ["rice", "wheat", "tea", "millets", "maize"]
+
+def _rule_based_ranking(N, ph, rainfall):
+    first = _rule_based_crop(N, ph, rainfall)
+    return [first] + [c for c in _FALLBACK_CROPS if c != first]
+
+def _parse_top_k(value):
+    """top_k request parameter → int in [0, 50]; 0 means "not requested". ValueError if invalid."""
+    if value is None or str(value).strip() == "":
+        return 0
+    k = to_float(value)
+    if k is None or not np.isfinite(k) or k < 0:
+        raise ValueError("top_k must be a non-negative number")
+    return min(int(k), 50)
+
+def _predict_samples(snap, samples, top_k=0):
+    """
+    Score samples with one predict_proba call over a NumPy matrix.
+    Returns (recommendations, top_lists or None, source). The recommendation
+    is the argmax class, i.e. exactly what model.predict would return.
+    """
+    model, feature_order = snap.predictor, snap.feature_order
+    if model is not None and feature_order is not None:
+        try:
+            X = np.array([[float(s[f]) for f in feature_order] for s in samples], dtype=np.float64)
+            proba = model.predict_proba(X)
+            classes = model.classes_
+            recs = [str(c) for c in classes.take(np.argmax(proba, axis=1))]
+            tops = None
+            if top_k:
+                # stable sort keeps argmax's first-index tie-break for rank 1
+                order = np.argsort(-proba, axis=1, kind="stable")[:, :top_k]
+                tops = [[{"crop": str(classes[j]), "probability": round(p[j], 4)} for j in idx]
+                        for p, idx in zip(proba, order)]
+            return recs, tops, "ml"
+        except Exception:
+            pass
+
+    rankings = [_rule_based_ranking(s["N"], s["ph"], s["rainfall"]) for s in samples]
+    tops = None
+    if top_k:
+        tops = [[{"crop": c, "probability": None} for c in r[:top_k]] for r in rankings]
+    return [r[0] for r in rankings], tops, "fallback"
+
+def _sample_inputs(s):
+    return {
+        "N": s["N"], "P": s["P"], "K": s["K"], "ph": s["ph"], "rainfall": s["rainfall"],
+        "temperature": float(s["temperature"]), "humidity": float(s["humidity"]),
+        "city": s["city"], "used_weather_api": s["used_weather_api"]
+    }
+
+@app.route("/api/predict-crop", methods=["POST"])
+@token_auth
+def predict_crop():
+    """
+    Optional top_k (int): also return the k most likely crops with probabilities
+    (rule-based fallback: a fixed ranking with probability null).
+    """
     try:
         data = request.get_json(force=True) or {}
+        top_k = _parse_top_k(data.get("top_k"))
 
-        # Safe parse
-        N = to_float(data.get("N"), 0.0)
-        P = to_float(data.get("P"), 0.0)
-        K = to_float(data.get("K"), 0.0)
-        ph = to_float(data.get("ph"), 7.0)
-        rainfall = to_float(data.get("rainfall"), 0.0)
-        city = (data.get("city") or "").strip()
+        # Safe parse + optional weather fetch
+        sample = _fill_weather(_parse_soil_sample(data))
 
-        temperature = to_float(data.get("temperature"), None)
-        humidity = to_float(data.get("humidity"), None)
+        # Predict: ML model (if loaded) else fallback rules
+        recs, tops, source = _predict_samples(_current_snapshot(), [sample], top_k)
 
-        used_weather_api = False
+        body = {
+            "ok": True,
+            "recommendation": recs[0],
+            "inputs": _sample_inputs(sample),
+            "source": source
+        }
+        if tops is not None:
+            body["top"] = tops[0]
+        return jsonify(body)
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"Prediction failed: {str(e)}"}), 400
 
-        # Optional: weather fetch (never crash)
-        try:
-            api_key = os.environ.get("OPENWEATHER_API_KEY", "")
-            if (temperature is None or humidity is None) and city and api_key:
-                t, h = get_weather(city, api_key)
-                if t is not None and h is not None:
-                    temperature, humidity = float(t), float(h)
-                    used_weather_api = True
-        except Exception:
-            pass
+def _read_batch_samples():
+    """
+    Samples for /api/predict-crop/batch from either:
+      - JSON: [ {...}, ... ] or {"samples": [ {...}, ... ]}
+      - CSV (Content-Type text/csv): header row with N,P,K,ph,rainfall,... columns
+    """
+    if request.mimetype in ("text/csv", "application/csv"):
+        text = request.get_data(as_text=True)
+        return list(csv.DictReader(io.StringIO(text)))
+    data = request.get_json(force=True)
+    if isinstance(data, dict):
+        data = data.get("samples")
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of samples or {\"samples\": [...]}")
+    return [d if isinstance(d, dict) else {} for d in data]
+
+@app.route("/api/predict-crop/batch", methods=["POST"])
+@token_auth
+def predict_crop_batch():
+    """
+    Scores many soil samples with a single predict_proba call.
+    Optional top_k via query string or {"samples": [...], "top_k": k}.
+    Response is NDJSON, one line per sample in input order:
+      {"index", "recommendation", "inputs", "source"[, "top"]}
+    """
+    try:
+        top_k = _parse_top_k(request.args.get("top_k"))
+        body = request.get_json(silent=True) if request.mimetype == "application/json" else None
+        if isinstance(body, dict) and body.get("top_k") is not None:
+            top_k = _parse_top_k(body.get("top_k"))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    try:
+        raw = _read_batch_samples()
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"Invalid batch body: {str(e)}"}), 400
+    if not raw:
+        return jsonify({"ok": False, "error": "no samples supplied"}), 400
+    if len(raw) > MAX_BATCH_SAMPLES:
+        return jsonify({"ok": False, "error": f"batch limited to {MAX_BATCH_SAMPLES} samples"}), 413
+
+    parsed = [_parse_soil_sample(d) for d in raw]
+    weather_cache = {}
+    api_key = os.environ.get("OPENWEATHER_API_KEY", "")
+    need_weather = [p["city"] for p in parsed
+                    if p["city"] and (p["temperature"] is None or p["humidity"] is None)]
+    if api_key and need_weather:
+        # resolve every distinct city concurrently up front
+        for w in get_weather_bulk(need_weather, api_key):
+            weather_cache[" ".join(w["city"].lower().split())] = (w["temperature"], w["humidity"])
+    samples = [_fill_weather(p, weather_cache) for p in parsed]
+
+    recs, tops, source = _predict_samples(_current_snapshot(), samples, top_k)
+
+    def generate():
+        for i, (s, rec) in enumerate(zip(samples, recs)):
+            line = {
+                "index": i,
+                "recommendation": rec,
+                "inputs": _sample_inputs(s),
+                "source": source
+            }
+            if tops is not None:
+                line["top"] = tops[i]
+            yield app.json.dumps_bytes(line, sort_keys=False) + b"\n"
 
-        if temperature is None: temperature = 25.0
-        if humidity is None: humidity = 60.0
+    return Response(generate(), mimetype="application/x-ndjson")
 
-        # Predict: ML model (if loaded) else fallback rules
-        if CROP_MODEL is not None and FEATURE_ORDER is not None:
-            try:
-                values = {
-                    "N": N, "P": P, "K": K,
-                    "temperature": float(temperature),
-                    "humidity": float(humidity),
-                    "ph": ph, "rainfall": rainfall
-                }
-                row = [[values[f] for f in FEATURE_ORDER]]
-                pred = CROP_MODEL.predict(row)
-                rec = str(pred[0])
-                source = "ml"
-            except Exception:
-                source = "fallback"
-                if rainfall > 200 and 6.0 <= ph <= 7.5:
-                    rec = "rice"
-                elif rainfall < 80 and 6.0 <= ph <= 7.8:
-                    rec = "wheat"
-                elif ph is not None and ph < 5.8:
-                    rec = "tea"
-                elif (ph is not None and ph > 7.8) and (N is not None and N < 50):
-                    rec = "millets"
-                else:
-                    rec = "maize"
-        else:
-            source = "fallback"
-            if rainfall > 200 and 6.0 <= ph <= 7.5:
-                rec = "rice"
-            elif rainfall < 80 and 6.0 <= ph <= 7.8:
-                rec = "wheat"
-            elif ph is not None and ph < 5.8:
-                rec = "tea"
-            elif (ph is not None and ph > 7.8) and (N is not None and N < 50):
-                rec = "millets"
-            else:
-                rec = "maize"
+MAX_BULK_WEATHER_CITIES = 5000
 
+@app.route("/api/weather/bulk", methods=["POST"])
+def weather_bulk():
+    """
+    Prefetch weather for many cities (fills the shared weather cache).
+    Input: {"cities": ["Pune", "Nashik", ...]}
+    Output: one entry per distinct city; per-city failures don't fail the batch.
+    """
+    try:
+        data = request.get_json(force=True) or {}
+        cities = data.get("cities")
+        if not isinstance(cities, list) or not cities:
+            return jsonify({"ok": False, "error": "cities (non-empty list) is required"}), 400
+        if len(cities) > MAX_BULK_WEATHER_CITIES:
+            return jsonify({"ok": False, "error": f"at most {MAX_BULK_WEATHER_CITIES} cities per call"}), 413
+        api_key = os.environ.get("OPENWEATHER_API_KEY", "")
+        if not api_key:
+            return jsonify({"ok": False, "error": "OPENWEATHER_API_KEY not configured"}), 503
+
+        results = get_weather_bulk([str(c) for c in cities if c], api_key)
+        resolved = sum(1 for r in results if r["temperature"] is not None)
         return jsonify({
             "ok": True,
-            "recommendation": rec,
-            "inputs": {
-                "N": N, "P": P, "K": K, "ph": ph, "rainfall": rainfall,
-                "temperature": float(temperature), "humidity": float(humidity),
-                "city": city, "used_weather_api": used_weather_api
-            },
-            "source": source
+            "results": results,
+            "summary": {"requested": len(cities), "unique": len(results),
+                        "resolved": resolved, "failed": len(results) - resolved},
         })
     except Exception as e:
-        return jsonify({"ok": False, "error": f"Prediction failed: {str(e)}"}), 400
+        traceback.print_exc()
+        return jsonify({"ok": False, "error": str(e)}), 500
 
 # ======================== Objective 2: Cycle Plan (state-aware) ========================
-@app.route("/api/cycle-plan", methods=["POST"])
+def _cycle_plan_inputs():
+    """(current_crop, region_raw, region) from the query string (GET) or JSON body (POST)."""
+    data = request.args if request.method in ("GET", "HEAD") else (request.get_json(force=True) or {})
+    curr = (data.get("current_crop") or "").strip().lower()
+    region_raw = (data.get("region") or "").strip()
+    index = _current_snapshot().region_index
+    resolved = index.resolve_state(region_raw) if index is not None and region_raw else None
+    return curr, region_raw, resolved or normalize_state(region_raw)  # Title Case normalization
+
+@app.route("/api/cycle-plan", methods=["GET", "POST"])
+@token_auth
+@http_cached(key_fn=lambda: _cycle_plan_inputs()[::2], version_fn=lambda: _RULES_VERSION, private=True)
 def cycle_plan():
+    """
+    Inputs (query string for GET, JSON body for POST): current_crop, region.
+    GET responses are cacheable and answer If-None-Match with 304.
+    """
     try:
-        data = request.get_json(force=True) or {}
-        curr = (data.get("current_crop") or "").strip().lower()
-        soil_type = (data.get("soil_type") or "").strip()
-        region_raw = (data.get("region") or "").strip()
-        region = normalize_state(region_raw)  # Title Case normalization
+        curr, region_raw, region = _cycle_plan_inputs()
 
         if not curr:
             return jsonify({"ok": False, "error": "current_crop is required"}), 400
@@ -416,45 +1035,171 @@ def cycle_plan():
         return jsonify({"ok": False, "error": str(e)}), 400
 
 # ======================== Objective 3: Regions & District recommendations ========================
+def _title(text):
+    return " ".join(str(text or "").split()).title()
+
+def resolve_region(state_raw, district_raw=None, snap=None):
+    """
+    (state, district) in the dataset's spelling, resolved through the snapshot's
+    RegionIndex: "Tamilnadu", "Bangalore Urban", "Prayagraj/Allahabad", typos.
+    Input that doesn't resolve unambiguously comes back Title Cased, so the
+    caller's usual "No records" 404 applies. Pass the handler's `snap` so the
+    names come from the same snapshot as the cube they are looked up in.
+    """
+    state, district = _title(state_raw), _title(district_raw) or None
+    index = (snap or _current_snapshot()).region_index
+    if index is None or not state:
+        return state, district
+    resolved = index.resolve_state(state_raw)
+    if resolved:
+        state = resolved
+        match = index.resolve_district(resolved, district_raw) if district else None
+        if match:
+            district = match.district
+    return state, district
+
+# The lists come precomputed from the snapshot's YieldCube; http_cached keys
+# them on the resolved state/district so "pune" and "Poona" share an ETag.
+def _region_args():
+    return list(resolve_region(request.args.get("state"), request.args.get("district") or ""))
+
 @app.route("/api/regions/states")
+@http_cached(key_fn=lambda: [])
 def list_states():
-    df = _load_district_df()
-    if df is None:
+    cube = _current_snapshot().yield_cube
+    if cube is None:
         return jsonify({"ok": False, "error": "district_crop_yield.csv missing"}), 500
-    states = sorted(df["State"].unique().tolist())
-    return jsonify({"ok": True, "states": states})
+    return jsonify({"ok": True, "states": cube.states})
 
 @app.route("/api/regions/districts")
+@http_cached(key_fn=lambda: _region_args()[:1])
 def list_districts():
-    state = (request.args.get("state") or "").strip().title()
-    df = _load_district_df()
-    if df is None:
+    state = _region_args()[0]
+    cube = _current_snapshot().yield_cube
+    if cube is None:
         return jsonify({"ok": False, "error": "district_crop_yield.csv missing"}), 500
     if not state:
         return jsonify({"ok": False, "error": "state query parameter is required"}), 400
-    sub = df[df["State"] == state]
-    districts = sorted(sub["District"].unique().tolist())
-    return jsonify({"ok": True, "state": state, "districts": districts})
+    return jsonify({"ok": True, "state": state, "districts": cube.districts.get(state, [])})
 
 @app.route("/api/regions/crops")
+@http_cached(key_fn=_region_args)
 def list_crops():
     """
     Query params: state, district
     Returns all crops available in that district.
     """
-    state = (request.args.get("state") or "").strip().title()
-    district = (request.args.get("district") or "").strip().title()
-    df = _load_district_df()
-    if df is None:
+    state, district = _region_args()
+    cube = _current_snapshot().yield_cube
+    if cube is None:
         return jsonify({"ok": False, "error": "district_crop_yield.csv missing"}), 500
     if not state or not district:
         return jsonify({"ok": False, "error": "state and district are required"}), 400
-    sub = df[(df["State"] == state) & (df["District"] == district)]
-    if sub.empty:
+    crops = cube.district_crops(state, district)
+    if not crops:
         return jsonify({"ok": False, "error": f"No records for {district}, {state}"}), 404
-    crops = sorted({c.title() for c in sub["Crop"].astype(str)})
     return jsonify({"ok": True, "state": state, "district": district, "crops": crops})
 
+MAX_SEARCH_RESULTS = 25
+
+@app.route("/api/regions/search")
+@http_cached()
+def search_regions():
+    """
+    Autocomplete over state and district names (prefix, old names, typos).
+    Query params: q (required), state (optional, limits districts to one state),
+      kind (optional: 'state' | 'district'), limit (optional, default 10)
+    """
+    q = (request.args.get("q") or "").strip()
+    kind = (request.args.get("kind") or "").strip().lower() or None
+    try:
+        limit = min(int(request.args.get("limit") or 10), MAX_SEARCH_RESULTS)
+    except ValueError:
+        return jsonify({"ok": False, "error": "limit must be an integer"}), 400
+    if not q:
+        return jsonify({"ok": False, "error": "q query parameter is required"}), 400
+    if kind not in (None, "state", "district"):
+        return jsonify({"ok": False, "error": "kind must be 'state' or 'district'"}), 400
+    index = _current_snapshot().region_index
+    if index is None:
+        return jsonify({"ok": False, "error": "district_crop_yield.csv missing"}), 500
+    state = request.args.get("state")
+    state = (index.resolve_state(state) or _title(state)) if state else None
+    matches = index.search(q, limit=limit, state=state, kind=kind)
+    return jsonify({"ok": True, "query": q, "results": [
+        {"kind": m.kind, "name": m.name, "state": m.state, "district": m.district, "score": m.score}
+        for m in matches]})
+
+MAX_FORECAST_HORIZON = 5
+
+def _parse_horizon(raw):
+    try:
+        horizon = int(raw or 1)
+    except (TypeError, ValueError):
+        raise ValueError("horizon must be an integer") from None
+    if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_FORECAST_HORIZON}")
+    return horizon
+
+def _forecast_fields(fc):
+    """JSON fields for one YieldForecast result."""
+    return {
+        "forecast_year": int(fc["year"]),
+        "forecast_yield": round(fc["forecast"], 2),
+        # a single record gives no spread to build an interval from
+        "forecast_range_80": ([round(fc["lower"], 2), round(fc["upper"], 2)]
+                              if np.isfinite(fc["upper"]) else None),
+        "trend_per_year": round(fc["slope"], 3),
+        "trend_r2": round(fc["r2"], 3),
+        "years_of_data": int(fc["years"]),
+    }
+
+@app.route("/api/yield-forecast", methods=["POST"])
+def yield_forecast():
+    """
+    Next-season yield forecasts from per-group linear trends (utils/yield_forecast.py).
+    Inputs: state, district (required); season, crop (optional); horizon (years ahead, default 1)
+    Output: forecasts ranked by forecast yield, each with the historical mean,
+      80% prediction range and the fitted trend.
+    """
+    snap = _current_snapshot()
+    try:
+        data = request.get_json(force=True) or {}
+        state, district = resolve_region(data.get("state"), data.get("district"), snap)
+        season = (data.get("season") or "").strip().title() or None
+        crop = (data.get("crop") or "").strip().lower()
+        horizon = _parse_horizon(data.get("horizon"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not state or not district:
+        return jsonify({"ok": False, "error": "state and district are required"}), 400
+
+    forecasts = snap.yield_forecast
+    if forecasts is None:
+        return jsonify({"ok": False, "error": "district_crop_yield.csv not found"}), 500
+
+    if crop:
+        fc = forecasts.forecast(state, district, crop, season, horizon)
+        if fc is None and canonical_crop(crop) != crop:
+            crop = canonical_crop(crop)
+            fc = forecasts.forecast(state, district, crop, season, horizon)
+        rows = [(crop, fc)] if fc is not None else []
+    else:
+        rows = forecasts.district(state, district, season, horizon)
+    if not rows:
+        return jsonify({"ok": False, "error": f"No records for {crop + ' in ' if crop else ''}{district}, {state}"}), 404
+
+    return jsonify({
+        "ok": True,
+        "state": state,
+        "district": district,
+        "season": season,
+        "horizon": horizon,
+        "unit": "quintal/ha",
+        "forecasts": [{"crop": c, "historical_mean": round(fc["mean"], 2), **_forecast_fields(fc)}
+                      for c, fc in rows],
+    })
+
 @app.route("/api/district-reco", methods=["POST"])
 def district_reco():
     """
@@ -462,6 +1207,8 @@ def district_reco():
       - state, district (required)
       - season (optional: 'Kharif' | 'Rabi' | 'Zaid' | 'Summer')
       - top_n (optional int, default 5)
+      - rank_by (optional: 'mean' (default) | 'forecast' = next-season trend forecast)
+      - horizon (optional years ahead for rank_by=forecast, default 1)
     """
     try:
         data = request.get_json(force=True) or {}
@@ -469,48 +1216,53 @@ def district_reco():
         district_raw = (data.get("district") or "").strip()
         season_raw = (data.get("season") or "").strip()
         top_n = int(data.get("top_n") or 5)
+        rank_by = (data.get("rank_by") or "mean").strip().lower()
+        if rank_by not in ("mean", "forecast"):
+            return jsonify({"ok": False, "error": "rank_by must be 'mean' or 'forecast'"}), 400
+        try:
+            horizon = _parse_horizon(data.get("horizon")) if rank_by == "forecast" else None
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
 
         if not state_raw or not district_raw:
             return jsonify({"ok": False, "error": "state and district are required"}), 400
 
-        state = " ".join(state_raw.lower().split()).title()
-        district = " ".join(district_raw.lower().split()).title()
+        snap = _current_snapshot()
+        state, district = resolve_region(state_raw, district_raw, snap)
         season = season_raw.title() if season_raw else None
 
-        df = _load_district_df()
-        if df is None:
+        cube = snap.yield_cube
+        if cube is None:
             return jsonify({"ok": False, "error": "district_crop_yield.csv not found"}), 500
 
-        sub = df[(df["State"] == state) & (df["District"] == district)].copy()
-        if season:
-            sub = sub[sub["Season"] == season]
-        if sub.empty:
+        if rank_by == "forecast":
+            top = [(crop, (fc["mean"], fc)) for crop, fc in
+                   snap.yield_forecast.district(state, district, season, horizon)[:max(top_n, 0)]]
+        else:
+            top = [(crop, (stats[0], None)) for crop, stats in cube.top_crops(state, district, season, top_n)]
+        if not top:
             return jsonify({"ok": False, "error": f"No records for {district}, {state}"}), 404
 
-        grp = (sub.groupby("Crop", as_index=False)["Yield_q_per_ha"].mean()
-                 .rename(columns={"Yield_q_per_ha": "Yield"}))
-        grp = grp.sort_values("Yield", ascending=False).head(top_n)
-
         results, chart = [], []
-        for _, row in grp.iterrows():
-            crop = str(row["Crop"])
-            avg_yield = float(row["Yield"])
+        for crop, (avg_yield, fc) in top:
             season_info = get_season_info(state, crop)
             tips = get_crop_tips(crop)[:3]
             results.append({
                 "crop": crop,
                 "avg_yield": round(avg_yield, 2),
+                **(_forecast_fields(fc) if fc else {}),
                 "season_window": season_info.get("window_text", ""),
                 "preferred_seasons": season_info.get("preferred", []),
                 "tips": tips
             })
-            chart.append({"name": crop.upper(), "yield": round(avg_yield, 2)})
+            chart.append({"name": crop.upper(), "yield": round(fc["forecast"] if fc else avg_yield, 2)})
 
         return jsonify({
             "ok": True,
             "district": district,
             "state": state,
             "season": season,
+            "rank_by": rank_by,
             "unit": "quintal/ha",
             "top": results,
             "chart": chart,
@@ -522,6 +1274,7 @@ def district_reco():
 
 # ======================== Objective 4: Profit Estimation ========================
 @app.route("/api/profit-estimate", methods=["POST"])
+@token_auth
 def profit_estimate():
     """
     Inputs (JSON):
@@ -532,6 +1285,9 @@ def profit_estimate():
       - area_ha (float; default 1)
       - price_override (optional Rs/quintal)
       - cost_override (optional Rs/ha)
+      - yield_basis (optional: 'mean' (default) | 'forecast' = next-season trend forecast)
+      - risk (optional bool): add a Monte Carlo "risk" block; tuned with
+        draws, price_band_pct, cost_band_pct, seed (see _parse_risk_options)
 
     Output:
       {
@@ -549,8 +1305,8 @@ def profit_estimate():
     try:
         data = request.get_json(force=True) or {}
 
-        state = " ".join((data.get("state") or "").strip().split()).title()
-        district = " ".join((data.get("district") or "").strip().split()).title()
+        snap = _current_snapshot()
+        state, district = resolve_region(data.get("state"), data.get("district"), snap)
         crop_raw = (data.get("crop") or "").strip()
         crop_lower = crop_raw.lower()
         season = (data.get("season") or "").strip().title() or None
@@ -559,20 +1315,26 @@ def profit_estimate():
         if not state or not district or not crop_lower:
             return jsonify({"ok": False, "error": "state, district, crop are required"}), 400
 
-        df = _load_district_df()
-        if df is None:
+        cube = snap.yield_cube
+        if cube is None:
             return jsonify({"ok": False, "error": "district_crop_yield.csv not found"}), 500
 
-        sub = df[(df["State"] == state) & (df["District"] == district) & (df["Crop"] == crop_lower)]
-        if season:
-            sub_season = sub[sub["Season"] == season]
-            if not sub_season.empty:
-                sub = sub_season
-        if sub.empty:
+        stats = cube.crop_stats(state, district, crop_lower, season)
+        if stats is None and canonical_crop(crop_lower) != crop_lower:
+            # e.g. "paddy" -> "rice", "tur" -> "pigeonpea"
+            crop_lower = canonical_crop(crop_lower)
+            stats = cube.crop_stats(state, district, crop_lower, season)
+        if stats is None:
             return jsonify({"ok": False, "error": f"No records for {crop_lower} in {district}, {state}"}), 404
 
-        # Average yield per hectare (quintal/ha)
-        yph = float(sub["Yield_q_per_ha"].mean())
+        # Average yield per hectare (quintal/ha), or the trend forecast for next season.
+        # The records' Series.mean() (`avg`), not the groupby mean district-reco ranks by.
+        yph = stats[4]
+        forecast = None
+        if (data.get("yield_basis") or "mean").strip().lower() == "forecast":
+            forecast = snap.yield_forecast.forecast(state, district, crop_lower, season)
+            if forecast is not None:
+                yph = forecast["forecast"]
         total_yield_q = yph * area_ha
 
         # Price / Cost (overrides or defaults)
@@ -581,18 +1343,17 @@ def profit_estimate():
         price_note = ""
         cost_note = ""
 
+        ref = snap.price_index.lookup(crop_lower)
         if price_used is None or str(price_used) == "":
-            p, c, note = _lookup_price_cost(crop_lower)
-            price_used = p
-            price_note = note
+            price_used = ref.price
+            price_note = ref.price_note
         else:
             price_used = float(price_used)
             price_note = "User override"
 
         if cost_used is None or str(cost_used) == "":
-            p, c, note = _lookup_price_cost(crop_lower)
-            cost_used = c
-            cost_note = note
+            cost_used = ref.cost
+            cost_note = ref.cost_note
         else:
             cost_used = float(cost_used)
             cost_note = "User override"
@@ -604,7 +1365,14 @@ def profit_estimate():
         decision = "Grow" if profit_rs >= 0 else "Avoid"
 
         def r2(x):  # round money cleanly
-            return int(round(float(x)))
+            return int(round(x))
+
+        risk = None
+        if data.get("risk"):
+            opts = _parse_risk_options(data)
+            sim = simulate_profit([cube.yield_samples(state, district, crop_lower, season)],
+                                  [price_used], [cost_used], area_ha, **opts)
+            risk = _risk_block(sim, 0, opts)
 
         return jsonify({
             "ok": True,
@@ -616,9 +1384,12 @@ def profit_estimate():
                 "season": season,
                 "area_ha": area_ha
             },
+            **({"risk": risk} if risk is not None else {}),
             "yield": {
                 "yield_q_per_ha": round(yph, 2),
-                "total_yield_quintal": round(total_yield_q, 2)
+                "total_yield_quintal": round(total_yield_q, 2),
+                **({"basis": "forecast", "historical_mean": round(stats[0], 2), **_forecast_fields(forecast)}
+                   if forecast is not None else {})
             },
             "economics": {
                 "price_rs_per_quintal_used": r2(price_used),
@@ -635,6 +1406,263 @@ def profit_estimate():
         traceback.print_exc()
         return jsonify({"ok": False, "error": str(e)}), 400
 
+# -------- Profit matrix: every district × crop in one vectorized pass --------
+MATRIX_JSON_CHUNK = 500
+
+def _parse_overrides(raw, name):
+    """{"crop": number} -> {canonical crop: float} ("paddy" -> "rice"); raises ValueError on bad input."""
+    if raw in (None, ""):
+        return {}
+    if not isinstance(raw, dict):
+        raise ValueError(f"{name} must be an object of crop -> number")
+    return {canonical_crop(str(k)): float(v) for k, v in raw.items() if v not in (None, "")}
+
+def _parse_crops(raw):
+    """Optional list of crop names -> canonical names (None = all); raises ValueError on bad input."""
+    if not raw:
+        return None
+    if not isinstance(raw, list):
+        raise ValueError("crops must be a list")
+    return sorted({canonical_crop(str(c)) for c in raw})
+
+def _select_crops(names, crops):
+    """Dataset crop names whose canonical name is in `crops` (canonical, from _parse_crops)."""
+    wanted = set(crops)
+    return [c for c in names if canonical_crop(c) in wanted]
+
+def _crop_economics(crops, price_index, price_overrides, cost_overrides):
+    """Per-crop price, cost and notes (arrays aligned with `crops`); overrides beat the index."""
+    price, cost, price_note, cost_note = [], [], [], []
+    for crop, ref in zip(crops, price_index.lookup_many(crops)):
+        key = canonical_crop(crop)  # override keys are canonical (_parse_overrides)
+        price.append(price_overrides.get(key, ref.price))
+        cost.append(cost_overrides.get(key, ref.cost))
+        price_note.append("User override" if key in price_overrides else ref.price_note)
+        cost_note.append("User override" if key in cost_overrides else ref.cost_note)
+    return (np.asarray(price, dtype=np.float64), np.asarray(cost, dtype=np.float64),
+            np.asarray(price_note, dtype=object), np.asarray(cost_note, dtype=object))
+
+def _profit_matrix(cube, price_index, state=None, season=None, area_ha=1.0, crops=None,
+                   price_overrides=None, cost_overrides=None, top_n=None):
+    """
+    yield × price − cost for every (district, crop) of a state or the whole country.
+    Returns a DataFrame sorted by State, District, profit (desc), with a
+    1-based `rank` inside each district.
+    """
+    df = cube.rows(state, season)
+    if crops:
+        df = df[df["Crop"].isin(_select_crops(df["Crop"].unique(), crops))]
+    df = df.reset_index(drop=True)
+
+    codes, uniques = pd.factorize(df["Crop"])
+    price_u, cost_u, pnote_u, cnote_u = _crop_economics(
+        list(uniques), price_index, price_overrides or {}, cost_overrides or {})
+
+    # same yield (the stored Series.mean, `avg`) and operation order as
+    # profit_estimate so single-crop numbers match exactly
+    yph = df["avg"].to_numpy(dtype=np.float64)
+    price = price_u[codes]
+    cost = cost_u[codes]
+    total_yield_q = yph * area_ha
+    revenue = total_yield_q * price
+    total_cost = area_ha * cost
+    profit = revenue - total_cost
+
+    out = pd.DataFrame({
+        "state": df["State"].to_numpy(), "district": df["District"].to_numpy(),
+        "crop": df["Crop"].to_numpy(), "records": df["count"].to_numpy(dtype=np.int64),
+        "yield_q_per_ha": yph, "total_yield_quintal": total_yield_q,
+        "price_rs_per_quintal_used": price, "cost_rs_per_hectare_used": cost,
+        "revenue_rs": revenue, "total_cost_rs": total_cost, "profit_rs": profit,
+        "price_note": pnote_u[codes], "cost_note": cnote_u[codes],
+    })
+    out = out.sort_values(["state", "district", "profit_rs", "crop"],
+                          ascending=[True, True, False, True], kind="mergesort")
+    out.insert(3, "rank", out.groupby(["state", "district"], sort=False).cumcount().to_numpy() + 1)
+    if top_n:
+        out = out[out["rank"] <= top_n]
+    return out.reset_index(drop=True)
+
+def _matrix_records(out, start, stop):
+    """JSON-ready row dicts for out[start:stop] (money rounded like profit-estimate)."""
+    part = out.iloc[start:stop]
+    money = ["price_rs_per_quintal_used", "cost_rs_per_hectare_used", "revenue_rs", "total_cost_rs", "profit_rs"]
+    cols = {c: part[c].tolist() for c in ["state", "district", "crop", "rank", "records", "price_note", "cost_note"]}
+    # Python's round (not np.round) so 2-dp ties land where profit-estimate's do
+    cols["yield_q_per_ha"] = [round(v, 2) for v in part["yield_q_per_ha"].tolist()]
+    cols["total_yield_quintal"] = [round(v, 2) for v in part["total_yield_quintal"].tolist()]
+    for c in money:
+        cols[c] = np.rint(part[c].to_numpy()).astype(np.int64).tolist()
+    cols["decision"] = np.where(part["profit_rs"].to_numpy() >= 0, "Grow", "Avoid").tolist()
+    keys = list(cols)
+    return [dict(zip(keys, vals)) for vals in zip(*(cols[k] for k in keys))]
+
+@app.route("/api/profit-matrix", methods=["POST"])
+@token_auth
+def profit_matrix():
+    """
+    Profit for every district × crop of a state (or the whole country) in one call.
+    Inputs (JSON):
+      - state (optional; omit or "all" for every state)
+      - season (optional; only crops with records in that season)
+      - area_ha (float; default 1)
+      - crops (optional list to restrict to)
+      - price_overrides / cost_overrides (optional {crop: Rs/quintal | Rs/ha})
+      - top_n (optional; keep the n most profitable crops per district)
+      - format: "json" (default) | "ndjson"  (also ?format=ndjson)
+    Output (streamed): {ok, inputs, summary, rows: [...]} or one row per NDJSON line.
+    Rows are grouped by state and district, most profitable crop first (rank 1).
+    """
+    snap = _current_snapshot()
+    try:
+        data = request.get_json(force=True) or {}
+        state_raw = (data.get("state") or "").strip()
+        state = "" if state_raw.lower() == "all" else resolve_region(state_raw, snap=snap)[0]
+        season = (data.get("season") or "").strip().title() or None
+        area_ha = float(data.get("area_ha") or 1.0)
+        crops = _parse_crops(data.get("crops"))
+        price_overrides = _parse_overrides(data.get("price_overrides"), "price_overrides")
+        cost_overrides = _parse_overrides(data.get("cost_overrides"), "cost_overrides")
+        top_n = int(data.get("top_n") or 0) or None
+        fmt = (request.args.get("format") or data.get("format") or "json").lower()
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    if snap.yield_cube is None:
+        return jsonify({"ok": False, "error": "district_crop_yield.csv not found"}), 500
+
+    out = _profit_matrix(snap.yield_cube, snap.price_index, state or None, season, area_ha,
+                         crops, price_overrides, cost_overrides, top_n)
+    if out.empty:
+        where = state or "any state"
+        return jsonify({"ok": False, "error": f"No records for {where}" + (f" in {season}" if season else "")}), 404
+
+    inputs = {"state": state or None, "season": season, "area_ha": area_ha, "crops": crops,
+              "top_n": top_n, "price_overrides": price_overrides, "cost_overrides": cost_overrides}
+    summary = {"rows": len(out), "states": out["state"].nunique(),
+               "districts": out[["state", "district"]].drop_duplicates().shape[0],
+               "crops": out["crop"].nunique()}
+
+    def chunks():
+        for start in range(0, len(out), MATRIX_JSON_CHUNK):
+            yield _matrix_records(out, start, start + MATRIX_JSON_CHUNK)
+
+    if fmt == "ndjson":
+        def generate_ndjson():
+            for rows in chunks():
+                yield b"".join(app.json.dumps_bytes(r, sort_keys=False) + b"\n" for r in rows)
+        return Response(generate_ndjson(), mimetype="application/x-ndjson")
+
+    def generate_json():
+        head = app.json.dumps_bytes({"ok": True, "inputs": inputs, "summary": summary}, sort_keys=False)
+        yield head[:-1] + b',"rows":['
+        first = True
+        for rows in chunks():
+            body = app.json.dumps_bytes(rows, sort_keys=False)[1:-1]
+            yield body if first else b"," + body
+            first = False
+        yield b"]}"
+    return Response(generate_json(), mimetype="application/json")
+
+# -------- Profit risk: Monte Carlo over recorded yields and a price band --------
+MAX_RISK_DRAWS = 200000
+
+def _parse_risk_options(data):
+    """draws / price_band_pct / cost_band_pct / seed from a request body (ValueError if out of range)."""
+    draws = int(data.get("draws") or 20000)
+    price_band = float(data.get("price_band_pct") if data.get("price_band_pct") not in (None, "") else 15) / 100
+    cost_band = float(data.get("cost_band_pct") or 0) / 100
+    seed = data.get("seed")
+    if not 100 <= draws <= MAX_RISK_DRAWS:
+        raise ValueError(f"draws must be between 100 and {MAX_RISK_DRAWS}")
+    if not (0 <= price_band < 1 and 0 <= cost_band < 1):
+        raise ValueError("price_band_pct and cost_band_pct must be in [0, 100)")
+    return {"draws": draws, "price_band": price_band, "cost_band": cost_band,
+            "seed": int(seed) if seed not in (None, "") else None}
+
+def _risk_block(sim, i, opts):
+    """JSON risk summary for crop i of a simulate_profit() result."""
+    def money(key):
+        return int(round(sim[key][i]))
+    return {
+        "draws": opts["draws"],
+        "price_band_pct": round(opts["price_band"] * 100, 2),
+        "cost_band_pct": round(opts["cost_band"] * 100, 2),
+        "profit_rs": {"p10": money("p10"), "p50": money("p50"), "p90": money("p90"),
+                      "mean": money("mean"), "std": money("std")},
+        "prob_loss": round(sim["prob_loss"][i], 4),
+        "breakeven_price_rs_per_quintal": round(sim["breakeven_price"][i], 2),
+        "breakeven_yield_q_per_ha": round(sim["breakeven_yield"][i], 2),
+    }
+
+@app.route("/api/profit-risk", methods=["POST"])
+@token_auth
+def profit_risk():
+    """
+    Monte Carlo profit risk for every crop recorded in a district, in one vectorized run.
+    Inputs (JSON):
+      - state, district (required); season (optional; only crops recorded in it)
+      - area_ha (default 1); crops (optional list)
+      - price_overrides / cost_overrides (optional {crop: Rs/quintal | Rs/ha})
+      - draws (default 20000, max 200000), price_band_pct (default 15),
+        cost_band_pct (default 0), seed (optional, for repeatable results)
+    Output: {ok, inputs, results: [...]} ranked by median (P50) profit; each result
+      has crop, yield_records, price/cost used + notes and the risk block.
+    """
+    snap = _current_snapshot()
+    try:
+        data = request.get_json(force=True) or {}
+        state, district = resolve_region(data.get("state"), data.get("district"), snap)
+        season = (data.get("season") or "").strip().title() or None
+        area_ha = float(data.get("area_ha") or 1.0)
+        crops = _parse_crops(data.get("crops"))
+        price_overrides = _parse_overrides(data.get("price_overrides"), "price_overrides")
+        cost_overrides = _parse_overrides(data.get("cost_overrides"), "cost_overrides")
+        opts = _parse_risk_options(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not state or not district:
+        return jsonify({"ok": False, "error": "state and district are required"}), 400
+
+    cube = snap.yield_cube
+    if cube is None:
+        return jsonify({"ok": False, "error": "district_crop_yield.csv not found"}), 500
+
+    ranked = dict(cube.top_crops(state, district, season, top_n=1 << 30))
+    names = list(ranked)
+    if crops:
+        names = _select_crops(names, crops)
+    if not names:
+        return jsonify({"ok": False, "error": f"No records for {district}, {state}"}), 404
+
+    samples = [cube.yield_samples(state, district, c, season) for c in names]
+    price, cost, price_note, cost_note = _crop_economics(names, snap.price_index, price_overrides, cost_overrides)
+    sim = simulate_profit(samples, price, cost, area_ha, **opts)
+
+    results = [{
+        "crop": crop,
+        "yield_records": len(samples[i]),
+        "yield_q_per_ha": round(ranked[crop][4], 2),
+        "price_rs_per_quintal_used": int(round(price[i])),
+        "cost_rs_per_hectare_used": int(round(cost[i])),
+        "price_note": price_note[i],
+        "cost_note": cost_note[i],
+        "risk": _risk_block(sim, i, opts),
+    } for i, crop in enumerate(names)]
+    results.sort(key=lambda r: (-r["risk"]["profit_rs"]["p50"], r["crop"]))
+    return jsonify({
+        "ok": True,
+        "inputs": {"state": state, "district": district, "season": season, "area_ha": area_ha,
+                   "crops": crops, "seed": opts["seed"]},
+        "results": results,
+    })
+
+# Under serve.py (CROPFIT_PREFORK=1) the master loads synchronously before forking and
+# each worker starts its own watcher: threads started here would not survive the fork.
+if os.environ.get("CROPFIT_PREFORK") != "1":
+    start_warm_up()
+    start_source_watcher()
+
 # ======================== Run ========================
 if __name__ == "__main__":
     # Keep 8080 to match your frontend calls (http://127.0.0.1:8080)
@@ -0,0 +1,369 @@
+# benchmarks/bench_api.py
+# -----------------------------------------------------------------------------
+# End-to-end API benchmark + load test, run per synthetic dataset scale.
+#
+# For every --scales entry (copies of each district, see
+# generate_full_district_dataset.py) it writes a scaled district CSV, a
+# scratch users.db and starts the local OpenWeather stub
+# (utils/weather_stub.py), so neither the real DB nor the network is touched.
+#   micro  a fresh process per scale drives the app through the Flask test
+#          client: per-endpoint latency without HTTP, plus load time and RSS
+#   load   serve.py (gunicorn; `python app.py`-style werkzeug if gunicorn is
+#          missing) serves the scale and --clients driver processes hit each
+#          scenario over keep-alive HTTP for --seconds: RPS, latency, errors,
+#          server RSS/PSS (master + workers + hash pools)
+# Auth is on (CROPFIT_REQUIRE_AUTH=1): protected endpoints send a bearer
+# token, and the "login" scenario runs the real password check.
+#
+# Everything is reported as JSON (stdout, or --out) so runs can be diffed:
+#   cd backend && python -m benchmarks.bench_api --scales 1,10 --out before.json
+#   ... change something ...
+#   cd backend && python -m benchmarks.bench_api --scales 1,10 --out after.json
+#   cd backend && python -m benchmarks.bench_api compare before.json after.json
+# Linux only (RSS/PSS come from /proc).
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_EMAIL = "bench@cropfit.local"
+BENCH_PASSWORD = "bench-password-1"
+
+
+# ------------------------------ scenarios ------------------------------------
+def make_scenarios(csv_path, n_params=64, seed=0):
+    """name -> (method, path, [json bodies or query strings], needs_token)."""
+    import pandas as pd
+    df = pd.read_csv(csv_path, usecols=["State", "District", "Crop"])
+    rng = random.Random(seed)
+    triples = list(df.drop_duplicates().itertuples(index=False, name=None))
+    picks = [triples[rng.randrange(len(triples))] for _ in range(n_params)]
+    states = sorted(df["State"].unique())
+    cities = ["Pune", "Nagpur", "Chennai", "Lucknow", "Patna", "Jaipur", "Indore", "Ludhiana"]
+    crops = ["rice", "wheat", "maize", "cotton", "sugarcane", "groundnut", "soybean", "pulses"]
+
+    def soil(i):
+        return {"N": 20 + i % 100, "P": 10 + (i * 7) % 80, "K": 10 + (i * 13) % 80,
+                "ph": 5.5 + (i % 20) / 10, "rainfall": 50 + (i * 37) % 250}
+    return {
+        "predict_crop": ("POST", "/api/predict-crop",
+                         [dict(soil(i), temperature=20 + i % 15, humidity=40 + i % 50) for i in range(n_params)], True),
+        "predict_crop_weather": ("POST", "/api/predict-crop",
+                                 [dict(soil(i), city=cities[i % len(cities)]) for i in range(n_params)], True),
+        "cycle_plan": ("POST", "/api/cycle-plan",
+                       [{"current_crop": crops[i % len(crops)], "region": states[i % len(states)]}
+                        for i in range(n_params)], True),
+        "district_reco": ("POST", "/api/district-reco",
+                          [{"state": s, "district": d, "top_n": 5} for s, d, _ in picks], False),
+        "profit_estimate": ("POST", "/api/profit-estimate",
+                            [{"state": s, "district": d, "crop": c.lower(), "area_ha": 2} for s, d, c in picks], True),
+        "regions_states": ("GET", "/api/regions/states", [""], False),
+        "regions_districts": ("GET", "/api/regions/districts",
+                              [f"state={s}" for s, _, _ in picks], False),
+        "regions_crops": ("GET", "/api/regions/crops",
+                          [f"state={s}&district={d}" for s, d, _ in picks], False),
+        "login": ("POST", "/api/login", [{"email": BENCH_EMAIL, "password": BENCH_PASSWORD}], False),
+    }
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"count": 0}
+    s = sorted(samples_ms)
+
+    def pct(p):
+        return round(s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))], 3)
+    return {"count": len(s), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "mean_ms": round(sum(s) / len(s), 3), "max_ms": round(s[-1], 3)}
+
+
+def memory_mb(pids):
+    """Summed RSS and PSS of `pids`. RSS counts shared pages (preloaded model/data) once per process; PSS splits them."""
+    totals = {"rss_mb": 0, "pss_mb": 0}
+    for pid in pids:
+        for path, field, key in ((f"/proc/{pid}/status", "VmRSS:", "rss_mb"),
+                                 (f"/proc/{pid}/smaps_rollup", "Pss:", "pss_mb")):
+            try:
+                with open(path) as f:
+                    totals[key] += next(int(line.split()[1]) for line in f if line.startswith(field))
+            except (OSError, StopIteration):
+                pass
+    return {k: round(v / 1024, 1) for k, v in totals.items()}
+
+
+def process_tree(pid):
+    """pid plus all descendants (gunicorn master -> workers -> hash pool)."""
+    out, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        out.append(p)
+        for task in os.listdir(f"/proc/{p}/task") if os.path.isdir(f"/proc/{p}/task") else []:
+            try:
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    todo.extend(int(c) for c in f.read().split())
+            except OSError:
+                pass
+    return out
+
+
+# ------------------------------ environment ----------------------------------
+def scale_env(workdir, scale, weather_port):
+    """Write the scaled dataset and return the env for an app process serving it."""
+    sys.path.insert(0, BASE_DIR)
+    from generate_full_district_dataset import generate
+    csv_path = os.path.join(workdir, f"district_crop_yield.x{scale}.csv")
+    if not os.path.exists(csv_path):
+        generate(csv_path, scale=scale)
+    env = dict(os.environ,
+               CROPFIT_DISTRICT_CSV=csv_path,
+               CROPFIT_DB_PATH=os.path.join(workdir, f"users.x{scale}.db"),
+               CROPFIT_REQUIRE_AUTH="1",
+               CROPFIT_TOKEN_SECRET="bench-secret",
+               CROPFIT_RELOAD_WATCH_SECS="0",
+               OPENWEATHER_BASE_URL=f"http://127.0.0.1:{weather_port}",
+               OPENWEATHER_API_KEY="stub",
+               PYTHONUNBUFFERED="1")
+    return env, csv_path
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ------------------------------ micro (in-process) ---------------------------
+def run_micro(csv_path, repeats):
+    """Runs inside a fresh process whose env already points at the scaled data."""
+    os.environ["CROPFIT_PREFORK"] = "1"  # no warm-up thread; load is timed below
+    mem_start = memory_mb([os.getpid()])
+    t0 = time.perf_counter()
+    import app as cropfit
+    cropfit._current_snapshot()
+    load_s = time.perf_counter() - t0
+    mem_loaded = memory_mb([os.getpid()])
+
+    client = cropfit.app.test_client()
+    client.post("/api/register", json={"name": "bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    token = client.post("/api/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}).get_json()["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    endpoints = {}
+    for name, (method, path, params, needs_token) in make_scenarios(csv_path).items():
+        n = min(repeats, 20) if name == "login" else repeats
+        samples, statuses = [], {}
+        for i in range(n + 1):
+            p = params[i % len(params)]
+            kw = {"query_string": p} if method == "GET" else {"json": p}
+            t = time.perf_counter()
+            resp = client.open(path, method=method, headers=auth if needs_token else {}, **kw)
+            resp.get_data()
+            if i:  # first call is warm-up
+                samples.append((time.perf_counter() - t) * 1000)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        endpoints[name] = dict(percentiles(samples), status=statuses)
+    snap = cropfit._current_snapshot()
+    return {"rows": len(snap.district_df), "load_s": round(load_s, 3), "load_timings_ms": snap.timings_ms,
+            "memory": {"start": mem_start, "loaded": mem_loaded, "end": memory_mb([os.getpid()])},
+            "endpoints": endpoints}
+
+
+# ------------------------------ load (HTTP) ----------------------------------
+def _client_loop(args):
+    """One driver process: hit one scenario for `seconds`, return latencies + status counts."""
+    import requests
+    base, method, path, params, headers, seconds, offset = args
+    session = requests.Session()
+    samples, statuses, errors = [], {}, 0
+    i = offset
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        p = params[i % len(params)]
+        i += 1
+        t = time.perf_counter()
+        try:
+            if method == "GET":
+                resp = session.get(f"{base}{path}?{p}" if p else f"{base}{path}", headers=headers, timeout=30)
+            else:
+                resp = session.post(f"{base}{path}", json=p, headers=headers, timeout=30)
+            resp.content
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        except requests.RequestException:
+            errors += 1
+            continue
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples, statuses, errors
+
+
+def start_server(env, port, workers, threads):
+    try:
+        import gunicorn  # noqa: F401
+        cmd = [sys.executable, "serve.py", "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+               "--threads", str(threads), "--max-requests", "0"]
+        kind = "gunicorn"
+    except ImportError:
+        cmd = [sys.executable, "-c", "import app; app.app.run(host='127.0.0.1', port=%d, threaded=True)" % port]
+        kind = "werkzeug"
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    return proc, kind
+
+
+def wait_ready(base, timeout_s=300):
+    import requests
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base}/api/ready", timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_load(env, csv_path, clients, seconds, workers, threads):
+    import requests
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc, kind = start_server(env, port, workers, threads)
+    try:
+        t0 = time.perf_counter()
+        if not wait_ready(base):
+            return {"error": "server did not become ready"}
+        ready_s = time.perf_counter() - t0
+        requests.post(f"{base}/api/register", json={"name": "bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        token = requests.post(f"{base}/api/login",
+                              json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}).json()["token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        mem_idle = memory_mb(process_tree(proc.pid))
+
+        scenarios = {}
+        ctx = mp.get_context("fork")
+        with ctx.Pool(clients) as pool:
+            for name, (method, path, params, needs_token) in make_scenarios(csv_path).items():
+                jobs = [(base, method, path, params, auth if needs_token else {}, seconds, k * 7)
+                        for k in range(clients)]
+                t = time.perf_counter()
+                parts = pool.map(_client_loop, jobs)
+                elapsed = time.perf_counter() - t
+                samples = [x for s, _, _ in parts for x in s]
+                statuses = {}
+                for _, st, _ in parts:
+                    for code, n in st.items():
+                        statuses[code] = statuses.get(code, 0) + n
+                scenarios[name] = dict(percentiles(samples), rps=round(len(samples) / elapsed, 1),
+                                       status=statuses, errors=sum(e for _, _, e in parts),
+                                       server_memory=memory_mb(process_tree(proc.pid)))
+        return {"server": kind, "workers": workers, "threads": threads, "clients": clients,
+                "seconds_per_scenario": seconds, "ready_s": round(ready_s, 2),
+                "server_memory_idle": mem_idle, "scenarios": scenarios}
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+
+# ------------------------------ compare --------------------------------------
+def compare(before_path, after_path):
+    """Per scale/endpoint deltas of p50/p95/p99 and RPS between two result files."""
+    with open(before_path) as f:
+        before = {r["scale"]: r for r in json.load(f)["runs"]}
+    with open(after_path) as f:
+        after = {r["scale"]: r for r in json.load(f)["runs"]}
+
+    def delta(a, b):
+        return None if a in (None, 0) or b is None else round((b - a) / a * 100, 1)
+    out = []
+    for scale in sorted(set(before) & set(after)):
+        for mode, key in (("micro", "endpoints"), ("load", "scenarios")):
+            a_all = (before[scale].get(mode) or {}).get(key, {})
+            b_all = (after[scale].get(mode) or {}).get(key, {})
+            for name in sorted(set(a_all) & set(b_all)):
+                a, b = a_all[name], b_all[name]
+                row = {"scale": scale, "mode": mode, "endpoint": name}
+                for m in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+                    if m in a and m in b:
+                        row[m] = [a[m], b[m], delta(a[m], b[m])]  # before, after, % change
+                out.append(row)
+    return out
+
+
+# ------------------------------ main -----------------------------------------
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        ap = argparse.ArgumentParser(description="Diff two bench_api result files")
+        ap.add_argument("cmd")
+        ap.add_argument("before")
+        ap.add_argument("after")
+        args = ap.parse_args()
+        print(json.dumps(compare(args.before, args.after), indent=2))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "_micro":  # child process of a micro run
+        print(json.dumps(run_micro(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    ap = argparse.ArgumentParser(description="CropFit API benchmark and load test")
+    ap.add_argument("--scales", default="1,10", help="dataset scales, e.g. 1,10,100")
+    ap.add_argument("--modes", default="micro,load")
+    ap.add_argument("--repeats", type=int, default=200, help="micro: calls per endpoint")
+    ap.add_argument("--clients", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+                    help="load: driver processes")
+    ap.add_argument("--seconds", type=float, default=5.0, help="load: duration per scenario")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--weather-latency-ms", type=float, default=50.0)
+    ap.add_argument("--workdir", default=None, help="where scaled CSVs and scratch DBs go (default: temp dir)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    from utils.weather_stub import serve as serve_weather
+    weather_port = free_port()
+    weather = serve_weather(weather_port, latency_ms=args.weather_latency_ms)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="cropfit-bench-")
+    modes = {m.strip() for m in args.modes.split(",")}
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    report = {"meta": {"commit": commit, "python": platform.python_version(), "cpus": os.cpu_count(),
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "args": vars(args), "workdir": workdir},
+              "runs": []}
+    for scale in [int(s) for s in args.scales.split(",") if s.strip()]:
+        env, csv_path = scale_env(workdir, scale, weather_port)
+        run = {"scale": scale}
+        if "micro" in modes:
+            res = subprocess.run([sys.executable, "-m", "benchmarks.bench_api", "_micro", csv_path, str(args.repeats)],
+                                 cwd=BASE_DIR, env=env, capture_output=True, text=True)
+            lines = [l for l in res.stdout.splitlines() if l.startswith("{")]
+            run["micro"] = json.loads(lines[-1]) if lines else {"error": res.stderr[-2000:]}
+        if "load" in modes:
+            run["load"] = run_load(env, csv_path, args.clients, args.seconds, args.workers, args.threads)
+        report["runs"].append(run)
+        print(f"✅ scale {scale} done", file=sys.stderr)
+    weather.shutdown()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_auth_db.py
+# -----------------------------------------------------------------------------
+# Auth DB throughput under concurrent logins + signups:
+#   legacy  sqlite3.connect per call, default rollback journal (the old get_db)
+#   pooled  utils/db_pool.SQLitePool (per-thread connection, WAL, NORMAL sync)
+#
+# Runs the same SQL as /api/login and /api/register against a scratch copy
+# of the schema (users.db is never touched). Password hashing is left out
+# so the numbers show the database path only.
+#
+#   cd backend && python -m benchmarks.bench_auth_db --threads 16 --seconds 5
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from utils.db_pool import SQLitePool
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT UNIQUE,
+        password_hash TEXT
+    )
+"""
+LOGIN_SQL = "SELECT id, name, email, password_hash FROM users WHERE email = ?"
+SIGNUP_SQL = "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)"
+FAKE_HASH = "scrypt:32768:8:1$" + "x" * 80
+
+
+def seed(path, n_users):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.execute(SCHEMA)
+    conn.executemany(SIGNUP_SQL, ((f"user{i}", f"user{i}@example.com", FAKE_HASH) for i in range(n_users)))
+    conn.commit()
+    conn.close()
+
+
+def legacy_conn(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def run(mode, path, n_threads, seconds, signup_ratio, n_users):
+    pool = SQLitePool(path) if mode == "pooled" else None
+    stop = time.perf_counter() + seconds
+    lat = {"login": [], "signup": []}
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(n_threads)
+
+    def worker(tid):
+        rng = random.Random(tid)
+        local = {"login": [], "signup": []}
+        errs, seq = [], 0
+        start.wait()
+        while time.perf_counter() < stop:
+            signup = rng.random() < signup_ratio
+            t0 = time.perf_counter()
+            try:
+                if mode == "pooled":
+                    conn = pool.connection()
+                else:
+                    conn = legacy_conn(path)
+                if signup:
+                    seq += 1
+                    with conn:
+                        conn.execute(SIGNUP_SQL, ("n", f"{mode}-{tid}-{seq}@example.com", FAKE_HASH))
+                else:
+                    conn.execute(LOGIN_SQL, (f"user{rng.randrange(n_users)}@example.com",)).fetchone()
+                if mode == "legacy":
+                    conn.close()
+                else:
+                    pool.release()
+            except sqlite3.Error as e:
+                errs.append(str(e))
+                continue
+            local["signup" if signup else "login"].append((time.perf_counter() - t0) * 1000)
+        with lock:
+            lat["login"] += local["login"]
+            lat["signup"] += local["signup"]
+            errors.extend(errs)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    if pool is not None:
+        pool.close_all()
+
+    def summary(samples):
+        if not samples:
+            return {"n": 0}
+        qs = statistics.quantiles(samples, n=100) if len(samples) > 1 else [samples[0]] * 99
+        return {"n": len(samples), "p50_ms": round(qs[49], 3), "p99_ms": round(qs[98], 3)}
+
+    total = len(lat["login"]) + len(lat["signup"])
+    return {"mode": mode, "ops_per_s": round(total / elapsed), "login": summary(lat["login"]),
+            "signup": summary(lat["signup"]), "errors": len(errors), "error_kinds": sorted(set(errors))[:3]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Auth DB: connect-per-call vs pooled WAL")
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--signup-ratio", type=float, default=0.1)
+    ap.add_argument("--users", type=int, default=5000)
+    args = ap.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("legacy", "pooled"):
+            path = os.path.join(tmp, f"{mode}.db")
+            seed(path, args.users)
+            results.append(run(mode, path, args.threads, args.seconds, args.signup_ratio, args.users))
+    print(json.dumps({"threads": args.threads, "seconds": args.seconds,
+                      "signup_ratio": args.signup_ratio, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_json_compression.py
+# -----------------------------------------------------------------------------
+# Per-endpoint response size and server CPU for:
+#   std     Flask's stdlib json encoder (FastJSONProvider with orjson off)
+#   fast    FastJSONProvider with orjson (utils/json_provider.py)
+#   gzip/br utils/compression.py at its configured levels
+#
+# Each request runs through the Flask test client (no network), so the
+# timings are handler + serialization + compression CPU. Auth is skipped
+# (CROPFIT_REQUIRE_AUTH is forced off).
+#
+#   cd backend && python -m benchmarks.bench_json_compression [--repeats 50]
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ["CROPFIT_PREFORK"] = "1"        # no warm-up/watcher threads
+os.environ["CROPFIT_REQUIRE_AUTH"] = "0"
+
+import app as cropfit  # noqa: E402
+from utils import compression  # noqa: E402
+from utils.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+ENDPOINTS = [
+    ("GET", "/api/regions/states", None),
+    ("GET", "/api/regions/districts?state=Uttar%20Pradesh", None),
+    ("GET", "/api/regions/crops?state=Maharashtra&district=Pune", None),
+    ("GET", "/api/cycle-plan?current_crop=rice&region=Tamil%20Nadu", None),
+    ("POST", "/api/district-reco", {"state": "Maharashtra", "district": "Pune", "top_n": 10}),
+    ("POST", "/api/profit-estimate", {"state": "Maharashtra", "district": "Pune", "crop": "rice"}),
+    ("POST", "/api/profit-risk", {"state": "Maharashtra", "district": "Pune", "seed": 1}),
+    ("POST", "/api/yield-forecast", {"state": "Maharashtra", "district": "Pune"}),
+    ("POST", "/api/predict-crop/batch", {"samples": [{"N": 90, "P": 42, "K": 43, "ph": 6.5, "rainfall": 200,
+                                                      "temperature": 25, "humidity": 80}] * 64, "top_k": 3}),
+    ("POST", "/api/profit-matrix", {"state": "Maharashtra"}),
+    ("POST", "/api/profit-matrix", {}),
+]
+
+
+class _StdProvider(FastJSONProvider):
+    use_orjson = False
+
+
+def _request(client, method, url, body, encoding):
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    t0 = time.perf_counter()
+    resp = client.open(url, method=method, json=body, headers=headers)
+    data = resp.get_data()  # drains streamed responses
+    return (time.perf_counter() - t0) * 1000, len(data), resp
+
+
+def _median_ms(client, method, url, body, encoding, repeats):
+    _request(client, method, url, body, encoding)  # warm-up
+    samples = [_request(client, method, url, body, encoding)[0] for _ in range(repeats)]
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON provider + response compression per endpoint")
+    ap.add_argument("--repeats", type=int, default=50)
+    args = ap.parse_args()
+
+    flask_app = cropfit.app
+    cropfit._current_snapshot()
+    client = flask_app.test_client()
+    providers = {"std": _StdProvider(flask_app), "fast": FastJSONProvider(flask_app)}
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+
+    report = {"orjson": orjson is not None, "brotli": compression.brotli is not None,
+              "compress_min_bytes": cropfit.COMPRESSOR.min_bytes if cropfit.COMPRESSOR else None,
+              "endpoints": []}
+    for method, url, body in ENDPOINTS:
+        name = f"{method} {url}" + (f" {json.dumps(body)[:60]}" if body else "")
+        row = {"endpoint": name}
+        for label, provider in providers.items():
+            flask_app.json = provider
+            row[f"{label}_ms"] = _median_ms(client, method, url, body, None, args.repeats)
+        row["identity_bytes"] = _request(client, method, url, body, None)[1]
+        for enc in encodings:
+            _, size, resp = _request(client, method, url, body, enc)
+            applied = resp.headers.get("Content-Encoding") == enc
+            row[f"{enc}_bytes"] = size if applied else None
+            row[f"{enc}_ms"] = _median_ms(client, method, url, body, enc, args.repeats) if applied else None
+        row["json_speedup"] = round(row["std_ms"] / row["fast_ms"], 2) if row["fast_ms"] else None
+        report["endpoints"].append(row)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
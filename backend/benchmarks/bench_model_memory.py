@@ -0,0 +1,105 @@
+# benchmarks/bench_model_memory.py
+# -----------------------------------------------------------------------------
+# Per-worker memory: private joblib.load of crop_model.pkl vs the shared,
+# memory-mapped flat forest (models/crop_model.forest, see utils/fast_forest.py).
+#
+# Starts N fresh worker processes per mode, has each load the model, score a
+# batch and touch every tree array, then report RSS / PSS / private bytes from
+# /proc/self/smaps_rollup while all N are alive. PSS splits shared pages across
+# the processes mapping them, so it shows what each worker really costs.
+# Linux only.
+#
+#   cd backend && python -m benchmarks.bench_model_memory --workers 4
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import warnings
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "crop_model.pkl")
+FOREST_PATH = os.path.join(BASE_DIR, "models", "crop_model.forest")
+
+
+def smaps_kb():
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                out[parts[0][:-1]] = int(parts[1])
+    return out
+
+
+def worker(mode, barrier, results):
+    import joblib
+    import numpy as np
+    import sklearn.ensemble  # noqa: F401  (imports are the same in both modes)
+    from utils.fast_forest import load_forest
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    before = smaps_kb()  # baseline after imports: the deltas are the model alone
+
+    if mode == "pickle":
+        model = joblib.load(MODEL_PATH)
+        arrays = [est.tree_.value for est in model.estimators_]
+    else:
+        model = load_forest(FOREST_PATH, mmap=True)
+        arrays = [model.left, model.right, model.feature, model.threshold, model.value]
+    model.predict(np.random.default_rng(0).uniform(0, 200, size=(64, 7)))
+    checksum = float(sum(float(np.asarray(a).sum()) for a in arrays))  # fault every page in
+
+    barrier.wait()  # all workers alive and loaded
+    after = smaps_kb()
+    barrier.wait()  # keep mappings until every worker has measured
+    results.put({
+        "mode": mode,
+        "pid": os.getpid(),
+        "rss_mb": round(after["Rss"] / 1024, 1),
+        "pss_mb": round(after["Pss"] / 1024, 1),
+        "private_mb": round((after["Private_Clean"] + after["Private_Dirty"]) / 1024, 1),
+        "model_rss_mb": round((after["Rss"] - before["Rss"]) / 1024, 1),
+        "model_pss_mb": round((after["Pss"] - before["Pss"]) / 1024, 1),
+        "checksum": checksum,
+    })
+
+
+def run_mode(mode, n_workers):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, barrier, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get(timeout=300) for _ in procs]
+    for p in procs:
+        p.join()
+    avg = {k: round(sum(r[k] for r in rows) / len(rows), 1)
+           for k in ("rss_mb", "pss_mb", "private_mb", "model_rss_mb", "model_pss_mb")}
+    return {"mode": mode, "workers": n_workers, "per_worker_avg": avg,
+            "total_pss_mb": round(sum(r["pss_mb"] for r in rows), 1), "per_worker": rows}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-worker RSS/PSS: pickle vs memory-mapped forest")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    if not os.path.exists(os.path.join(FOREST_PATH, "meta.json")):
+        import joblib
+        from utils.fast_forest import CompiledForest, save_forest, source_fingerprint
+        save_forest(CompiledForest(joblib.load(MODEL_PATH)), FOREST_PATH,
+                    source=source_fingerprint(MODEL_PATH))
+
+    report = {
+        "model_pickle_mb": round(os.path.getsize(MODEL_PATH) / 1e6, 2),
+        "forest_files_mb": round(sum(os.path.getsize(os.path.join(FOREST_PATH, f))
+                                     for f in os.listdir(FOREST_PATH)) / 1e6, 2),
+        "modes": [run_mode("pickle", args.workers), run_mode("mmap", args.workers)],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_predictor.py
+# -----------------------------------------------------------------------------
+# sklearn RandomForest .predict vs the flat-array CompiledForest
+# (utils/fast_forest.py): checks bit-identical output, then times single-row
+# and batched inference.
+#
+#   cd backend && python -m benchmarks.bench_predictor [--model models/crop_model.pkl]
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import statistics
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.fast_forest import CompiledForest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "Crop_recommendation.csv")
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+
+def time_call(fn, X, repeats):
+    fn(X)  # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="sklearn predict vs CompiledForest")
+    ap.add_argument("--model", default=os.path.join(BASE_DIR, "models", "crop_model.pkl"))
+    ap.add_argument("--sizes", default="1,8,32,128,1024")
+    ap.add_argument("--repeats", type=int, default=30)
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    model = joblib.load(args.model)
+    t0 = time.perf_counter()
+    compiled = CompiledForest(model)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    X = pd.read_csv(DATA_PATH)[FEATURES].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(0)
+    X_rand = rng.uniform(X.min(axis=0), X.max(axis=0), size=(5000, X.shape[1]))
+
+    identical = True
+    for A in (X, X_rand):
+        for start in range(0, len(A), compiled.max_batch):
+            chunk = A[start:start + compiled.max_batch]
+            identical &= np.array_equal(model.predict_proba(chunk), compiled.predict_proba(chunk))
+            identical &= np.array_equal(model.predict(chunk), compiled.predict(chunk))
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        batch = np.resize(X, (size, X.shape[1]))
+        repeats = args.repeats if size <= 128 else max(3, args.repeats // 5)
+        sk = time_call(model.predict, batch, repeats)
+        cf = time_call(compiled.predict, batch, repeats)
+        results.append({
+            "batch_size": size,
+            "sklearn": sk,
+            "compiled": cf,
+            "speedup": round(sk["median_ms"] / cf["median_ms"], 1) if cf["median_ms"] else None,
+            "path": "flat-array" if size <= compiled.max_batch else "sklearn (above max_batch)",
+        })
+
+    print(json.dumps({
+        "model": os.path.relpath(args.model, BASE_DIR),
+        "n_trees": compiled.n_trees,
+        "n_nodes": int(compiled.left.size),
+        "max_depth": compiled.max_depth,
+        "compile_ms": round(compile_ms, 1),
+        "bit_identical": bool(identical),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
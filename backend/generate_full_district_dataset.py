@@ -1,12 +1,29 @@
 # generate_full_district_dataset.py
-import csv, os, random
+#   python generate_full_district_dataset.py                 -> data/district_crop_yield.csv
+#   python generate_full_district_dataset.py --scale 1000 --years 2000-2022 --out /data/x1000.csv
+#   python generate_full_district_dataset.py --scale 1000 --format parquet --out /data/x1000.parquet
+# --scale N repeats every district N times ("Pune", "Pune 2", ... "Pune N"), each with its
+# own random crops and yields. Rows = districts x scale x years x crops-per-district.
+#
+# Built for 10M-100M+ rows with bounded memory:
+#   * districts are cut into shards of about --shard-rows rows; shards run on a
+#     process pool (--workers) and each draws its rows with vectorized NumPy
+#   * shard i uses the RNG stream SeedSequence(--seed, spawn_key=(i,)), so the output
+#     depends only on --seed and --shard-rows, not on --workers or scheduling
+#   * csv: each shard writes a headerless part file that is appended to --out in
+#     shard order as soon as it is done; parquet: one file per shard and state
+#     under --out/State=<state>/ (needs pyarrow)
+import argparse, os, shutil, sys, tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-random.seed(42)
+
+import numpy as np
+import pandas as pd
 
 BASE = Path(__file__).parent
 DATA_DIR = BASE / "data"
-DATA_DIR.mkdir(exist_ok=True)
 OUT = DATA_DIR / "district_crop_yield.csv"
+FIELDS = ["State","District","Year","Season","Crop","Area_ha","Production_q","Yield_q_per_ha"]
 
 # --- STATES → DISTRICTS (curated list; add more anytime) ---
 states_to_districts = {
@@ -95,57 +112,143 @@ state_bumps = {
     "Telangana": {"Cotton": +2, "Maize": +1}
 }
 
-years = list(range(2015, 2023))  # 2015–2022
+DEFAULT_YEARS = "2015-2022"
+MAX_CROPS_PER_DISTRICT = len(crops)
 
-def yield_for(state, crop):
-    base = crop_base.get(crop, 18)
-    bump = state_bumps.get(state, {}).get(crop, 0)
-    noise = random.uniform(-0.12, 0.12)  # ±12%
-    y = max(5.0, (base + bump) * (1 + noise))
-    return round(y, 1)
+# --- lookup tables for the vectorized draws (index = position in `crops`) ---
+STATES = list(states_to_districts)
+BASE_YIELD = np.array([crop_base.get(c, 18) for c in crops], dtype=np.float64)
+BUMP = np.array([[state_bumps.get(s, {}).get(c, 0) for c in crops] for s in STATES], dtype=np.float64)
+SEASONS = sorted({x for c in crops for x in crop_seasons.get(c, ["Kharif"])})
+N_SEASONS = np.array([len(crop_seasons.get(c, ["Kharif"])) for c in crops])
+SEASON_TABLE = np.zeros((len(crops), N_SEASONS.max()), dtype=np.int64)
+for _i, _c in enumerate(crops):
+    for _k, _season in enumerate(crop_seasons.get(_c, ["Kharif"])):
+        SEASON_TABLE[_i, _k] = SEASONS.index(_season)
+AREA_PLUS = np.isin(crops, ["Sugarcane","Cotton","Rice","Wheat"])
+AREA_MINUS = np.isin(crops, ["Potato","Onion","Tomato"])
 
-def area_for(state, district, crop):
-    # heuristic area in ha
-    base = random.randint(2000, 20000)
-    if crop in ("Sugarcane","Cotton","Rice","Wheat"): base += 4000
-    if crop in ("Potato","Onion","Tomato"): base -= 1000
-    return max(800, base)
+def parse_years(text):
+    """'2015-2022' -> [2015, ..., 2022]; '2020' -> [2020]."""
+    lo, _, hi = str(text).partition("-")
+    lo, hi = int(lo), int(hi or lo)
+    if hi < lo:
+        raise ValueError(f"bad year range {text!r}")
+    return list(range(lo, hi + 1))
+
+def district_list(scale=1):
+    """[(state index, district name)] in output order."""
+    out = []
+    for si, (state, districts) in enumerate(states_to_districts.items()):
+        for base_district in districts:
+            out.extend((si, base_district if k == 1 else f"{base_district} {k}") for k in range(1, scale + 1))
+    return out
+
+def shard_frame(shard, districts, years, crops_per_district, seed):
+    """DataFrame of one shard's rows (district-major, then year, then crop)."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard,)))
+    D, Y, C = len(districts), len(years), crops_per_district
+    state_idx = np.array([s for s, _ in districts], dtype=np.int64)
 
-def production_from(area, y_q_ha):
+    # crop subset per district: first C of a random permutation
+    crop = np.argsort(rng.random((D, len(crops))), axis=1)[:, :C]          # (D, C)
+    crop = np.broadcast_to(crop[:, None, :], (D, Y, C)).reshape(-1)
+    state = np.repeat(state_idx, Y * C)
+    year = np.tile(np.repeat(np.asarray(years, dtype=np.int64), C), D)
+    n = len(crop)
+
+    season = SEASON_TABLE[crop, (rng.random(n) * N_SEASONS[crop]).astype(np.int64)]
+    noise = rng.uniform(-0.12, 0.12, n)                                      # ±12%
+    y = np.round(np.maximum(5.0, (BASE_YIELD[crop] + BUMP[state, crop]) * (1 + noise)), 1)
+    # heuristic area in ha
+    area = rng.integers(2000, 20001, n) + 4000 * AREA_PLUS[crop] - 1000 * AREA_MINUS[crop]
+    area = np.maximum(800, area)
     # yield is quintal/ha; production in quintal
-    q = int(area * y_q_ha)
-    return max(1000, q)
-
-rows = []
-for state, districts in states_to_districts.items():
-    for district in districts:
-        # choose a subset of crops per district to keep file size reasonable
-        district_crops = random.sample(crops, k=min(8, len(crops)))
-        for year in years:
-            for crop in district_crops:
-                seasons = crop_seasons.get(crop, ["Kharif"])
-                season = random.choice(seasons)
-                y = yield_for(state, crop)
-                area = area_for(state, district, crop)
-                prod = production_from(area, y)
-                rows.append({
-                    "State": state,
-                    "District": district,
-                    "Year": year,
-                    "Season": season,
-                    "Crop": crop,
-                    "Area_ha": area,
-                    "Production_q": prod,
-                    "Yield_q_per_ha": y
-                })
-
-# Write CSV
-with open(OUT, "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=[
-        "State","District","Year","Season","Crop","Area_ha","Production_q","Yield_q_per_ha"
-    ])
-    w.writeheader()
-    w.writerows(rows)
-
-print(f"✅ Wrote {len(rows)} rows to {OUT}")
-print("Example:", rows[0])
+    prod = np.maximum(1000, (area * y).astype(np.int64))
+
+    names = np.array([d for _, d in districts], dtype=object)
+    return pd.DataFrame({
+        "State": pd.Categorical.from_codes(state, STATES),
+        "District": np.repeat(names, Y * C),
+        "Year": year,
+        "Season": pd.Categorical.from_codes(season, SEASONS),
+        "Crop": pd.Categorical.from_codes(crop, crops),
+        "Area_ha": area,
+        "Production_q": prod,
+        "Yield_q_per_ha": y,
+    }, columns=FIELDS)
+
+def _write_shard(job):
+    shard, districts, years, crops_per_district, seed, fmt, target = job
+    df = shard_frame(shard, districts, years, crops_per_district, seed)
+    if fmt == "csv":
+        df.to_csv(target, header=False, index=False, float_format="%.1f")
+    else:
+        for state, part in df.groupby("State", observed=True, sort=False):
+            folder = Path(target) / f"State={state}"
+            folder.mkdir(parents=True, exist_ok=True)
+            part.drop(columns="State").to_parquet(folder / f"part-{shard:05d}.parquet", index=False)
+    return len(df)
+
+def generate(out=OUT, scale=1, years=DEFAULT_YEARS, crops_per_district=8, fmt="csv",
+             seed=42, workers=None, shard_rows=500_000):
+    """Write the dataset to `out` (CSV file, or Parquet directory); returns the row count."""
+    years = parse_years(years) if isinstance(years, str) else list(years)
+    crops_per_district = max(1, min(int(crops_per_district), MAX_CROPS_PER_DISTRICT))
+    districts = district_list(max(1, int(scale)))
+    per_shard = max(1, shard_rows // (len(years) * crops_per_district))
+    shards = [districts[i:i + per_shard] for i in range(0, len(districts), per_shard)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shards)))
+
+    out = Path(out)
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("⚠️ Parquet output needs pyarrow (pip install pyarrow)")
+        if out.exists():
+            shutil.rmtree(out)
+        out.mkdir(parents=True)
+        parts_dir = None
+    else:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        parts_dir = tempfile.mkdtemp(prefix=".parts-", dir=out.parent)
+
+    jobs = [(i, shard, years, crops_per_district, seed, fmt,
+             os.path.join(parts_dir, f"part-{i:05d}.csv") if parts_dir else str(out))
+            for i, shard in enumerate(shards)]
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if parts_dir is None:
+                total = sum(pool.map(_write_shard, jobs))
+            else:
+                with open(out, "w", newline="", encoding="utf-8") as f:
+                    f.write(",".join(FIELDS) + "\n")
+                    # map() yields in shard order: append each part as soon as it (and all before it) is done
+                    for job, rows in zip(jobs, pool.map(_write_shard, jobs)):
+                        with open(job[-1], encoding="utf-8") as part:
+                            shutil.copyfileobj(part, f, 1 << 20)
+                        os.remove(job[-1])
+                        total += rows
+    finally:
+        if parts_dir:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    return total
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Synthetic district crop yield dataset")
+    ap.add_argument("--scale", type=int, default=1, help="copies of every district (districts-per-state multiplier)")
+    ap.add_argument("--years", default=DEFAULT_YEARS, help="year range, e.g. 2000-2022")
+    ap.add_argument("--crops-per-district", type=int, default=8, help=f"1-{MAX_CROPS_PER_DISTRICT}")
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    ap.add_argument("--out", default=None, help="CSV file, or directory for parquet")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--shard-rows", type=int, default=500_000, help="rows per shard (bounds memory per worker)")
+    args = ap.parse_args()
+
+    out = args.out or (OUT if args.format == "csv" else DATA_DIR / "district_crop_yield.parquet")
+    n = generate(out, args.scale, args.years, args.crops_per_district, args.format,
+                 args.seed, args.workers, args.shard_rows)
+    print(f"✅ Wrote {n} rows to {out}")
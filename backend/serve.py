@@ -0,0 +1,107 @@
+# serve.py — production entry point (pre-fork gunicorn, every core)
+#
+# The master imports app.py and builds the data snapshot once (model, district
+# and price frames, yield cube) before forking, so workers start ready and
+# share those pages copy-on-write. Following the gc module docs: GC is disabled
+# while the master loads, everything is moved to the permanent generation with
+# gc.freeze() before each fork, and GC is re-enabled in the child, so
+# collections in workers never write to the inherited objects' GC headers.
+#
+# Workers are recycled after --max-requests (± jitter) to cap slow leaks.
+# Each worker runs its own source watcher (CROPFIT_RELOAD_WATCH_SECS);
+# POST /api/admin/reload only reaches the worker that serves it.
+# Each worker also forks its own password-hash pool (CROPFIT_HASH_WORKERS),
+# sized by default so that all workers' pools together use about the host's
+# cores (see utils/password_hashing.py).
+#
+#   pip install gunicorn
+#   python serve.py                           # all cores, 0.0.0.0:8080
+#   python serve.py --workers 4 --threads 8 --max-requests 5000
+#
+# Every flag has an env equivalent: CROPFIT_BIND, CROPFIT_WORKERS,
+# CROPFIT_THREADS, CROPFIT_MAX_REQUESTS, CROPFIT_MAX_REQUESTS_JITTER,
+# CROPFIT_TIMEOUT. gunicorn is POSIX-only; on Windows use `python app.py`.
+
+import argparse, gc, os, sys
+
+os.environ["CROPFIT_PREFORK"] = "1"  # read by app.py at import
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    sys.exit("⚠️ gunicorn is not installed (pip install gunicorn); for development use `python app.py`")
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class CropFitServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # With preload_app this runs once, in the master, before any fork.
+        gc.disable()
+        import app as cropfit
+        cropfit.warm_up()
+        if not cropfit._READY.is_set():
+            print("⚠️ Warm-up failed in master; workers will retry:", cropfit._WARMUP["error"])
+        gc.collect()
+        return cropfit.app
+
+
+def pre_fork(server, worker):
+    gc.freeze()  # cumulative; also covers anything the master allocated since the last fork
+
+
+def post_fork(server, worker):
+    gc.enable()
+    import app as cropfit
+    from utils.password_hashing import get_hasher
+    get_hasher().start()  # fork the hash pool before this worker starts any threads
+    if not cropfit._READY.is_set():
+        cropfit.start_warm_up()  # master load failed: retry in the background here
+    cropfit.start_source_watcher()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve CropFit with pre-forked gunicorn workers")
+    ap.add_argument("--bind", default=os.environ.get("CROPFIT_BIND", "0.0.0.0:8080"))
+    ap.add_argument("--workers", type=int, default=_env_int("CROPFIT_WORKERS", os.cpu_count() or 1))
+    ap.add_argument("--threads", type=int, default=_env_int("CROPFIT_THREADS", 4),
+                    help="threads per worker (covers OpenWeather I/O waits)")
+    ap.add_argument("--max-requests", type=int, default=_env_int("CROPFIT_MAX_REQUESTS", 10000),
+                    help="recycle a worker after this many requests (0 = never)")
+    ap.add_argument("--max-requests-jitter", type=int, default=_env_int("CROPFIT_MAX_REQUESTS_JITTER", 1000),
+                    help="random spread so workers don't all restart together")
+    ap.add_argument("--timeout", type=int, default=_env_int("CROPFIT_TIMEOUT", 60))
+    args = ap.parse_args()
+    # read by utils/password_hashing.py to split the cores across the workers' hash pools
+    os.environ["CROPFIT_WORKERS"] = str(max(1, args.workers))
+
+    CropFitServer({
+        "bind": args.bind,
+        "workers": max(1, args.workers),
+        "threads": max(1, args.threads),
+        "worker_class": "gthread" if args.threads > 1 else "sync",
+        "max_requests": max(0, args.max_requests),
+        "max_requests_jitter": max(0, args.max_requests_jitter),
+        "timeout": args.timeout,
+        "preload_app": True,
+        "pre_fork": pre_fork,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# tests/test_fast_forest.py
+# -----------------------------------------------------------------------------
+# CompiledForest must score NaN features exactly like the sklearn model, on
+# the compiled path and on the memory-mapped path (no sklearn model behind it)
+#
+#   cd backend && python -m pytest -q tests
+# -----------------------------------------------------------------------------
+
+import numpy as np
+import pytest
+
+ensemble = pytest.importorskip("sklearn.ensemble")
+
+from utils.fast_forest import compile_forest, load_forest, save_forest  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, size=(400, 7))
+    y = np.where(X[:, 0] + X[:, 5] > 100, "rice", np.where(X[:, 6] > 50, "maize", "chickpea"))
+    return ensemble.RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+
+
+def _batch_with_nans(seed=1, n=64):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 100, size=(n, 7))
+    X[rng.random(X.shape) < 0.15] = np.nan
+    X[0] = np.nan  # an all-missing row
+    return X
+
+
+def test_nan_rows_match_sklearn(model):
+    X = _batch_with_nans()
+    forest = compile_forest(model)
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+
+
+def test_nan_rows_match_sklearn_when_memory_mapped(model, tmp_path):
+    X = _batch_with_nans(seed=2, n=300)  # above max_batch: chunked flat path
+    forest = load_forest(save_forest(compile_forest(model), str(tmp_path / "forest")))
+    assert forest.model is None
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(forest.predict(X), model.predict(X))
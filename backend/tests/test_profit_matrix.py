@@ -0,0 +1,57 @@
+# tests/test_profit_matrix.py
+# -----------------------------------------------------------------------------
+# Every /api/profit-matrix row must equal the /api/profit-estimate response for
+# the same state, district, crop and season (same yield, same rupee rounding)
+#
+#   cd backend && python -m pytest -q tests
+# -----------------------------------------------------------------------------
+
+import os
+
+import pytest
+
+os.environ.setdefault("CROPFIT_PREFORK", "1")  # no warm-up/watcher threads on import
+os.environ.setdefault("CROPFIT_REQUIRE_AUTH", "0")
+
+import app as cropfit  # noqa: E402
+
+_FIELDS = {
+    "yield_q_per_ha": ("yield", "yield_q_per_ha"),
+    "total_yield_quintal": ("yield", "total_yield_quintal"),
+    "price_rs_per_quintal_used": ("economics", "price_rs_per_quintal_used"),
+    "cost_rs_per_hectare_used": ("economics", "cost_rs_per_hectare_used"),
+    "revenue_rs": ("economics", "revenue_rs"),
+    "total_cost_rs": ("economics", "total_cost_rs"),
+    "profit_rs": ("economics", "profit_rs"),
+    "decision": ("economics", "decision"),
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    if cropfit._current_snapshot().yield_cube is None:
+        pytest.skip("district_crop_yield.csv not found")
+    return cropfit.app.test_client()
+
+
+@pytest.mark.parametrize("body", [
+    {"state": "all", "area_ha": 2.5},
+    {"state": "all", "season": "Kharif", "area_ha": 3,
+     "price_overrides": {"paddy": 2400}, "cost_overrides": {"wheat": 31000}},
+])
+def test_matrix_rows_match_profit_estimate(client, body):
+    resp = client.post("/api/profit-matrix", json=body)
+    assert resp.status_code == 200
+    rows = resp.get_json()["rows"]
+    assert rows
+
+    prices = {"rice": 2400} if "price_overrides" in body else {}
+    costs = {"wheat": 31000} if "cost_overrides" in body else {}
+    for row in rows:
+        est = client.post("/api/profit-estimate", json={
+            "state": row["state"], "district": row["district"], "crop": row["crop"],
+            "season": body.get("season"), "area_ha": body["area_ha"],
+            "price_override": prices.get(row["crop"]), "cost_override": costs.get(row["crop"]),
+        }).get_json()
+        got = {k: est[section][field] for k, (section, field) in _FIELDS.items()}
+        assert {k: row[k] for k in _FIELDS} == got, (row["state"], row["district"], row["crop"])
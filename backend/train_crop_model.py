@@ -1,37 +1,171 @@
-import os, joblib
+# train_crop_model.py — Objective 1 model training & selection
+#
+# 1) Parallel grid search (n_estimators × max_depth × max_leaf_nodes) with
+#    stratified k-fold CV on macro F1, using every core.
+# 2) For every candidate within --f1-tolerance of the best CV score: fit on the
+#    train split, then measure holdout F1, serialized size and single-row /
+#    batch inference latency (through the same compiled predictor the API uses).
+# 3) Keep the smallest, then fastest, of those candidates.
+#
+# Writes models/crop_model.pkl, models/feature_order.pkl,
+# models/crop_model.meta.json (chosen params, scores, latency, size, all candidates)
+# and models/crop_model.forest/ (raw .npy tree arrays the API memory-maps).
+#
+#   python train_crop_model.py                 # full grid
+#   python train_crop_model.py --quick         # small grid for a fast sanity run
+
+import argparse, hashlib, io, json, os, statistics, time, warnings
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+import sklearn
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import f1_score
 
-DATA_PATH = os.path.join("data", "crop_recommendation.csv")
-MODEL_PATH = os.path.join("models", "crop_model.pkl")
-FEATURES_PATH = os.path.join("models", "feature_order.pkl")
-
-df = pd.read_csv(DATA_PATH)
-
-required = ["N","P","K","temperature","humidity","ph","rainfall","label"]
-missing = [c for c in required if c not in df.columns]
-if missing:
-    raise ValueError(f"Missing columns: {missing}")
-
-X = df[["N","P","K","temperature","humidity","ph","rainfall"]]
-y = df["label"].astype(str)
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-clf = RandomForestClassifier(
-    n_estimators=300,
-    random_state=42,
-    class_weight="balanced_subsample",
-)
-clf.fit(X_train, y_train)
-pred = clf.predict(X_test)
-print("✅ F1 macro:", round(f1_score(y_test, pred, average="macro"), 4))
-
-os.makedirs("models", exist_ok=True)
-joblib.dump(clf, MODEL_PATH)
-joblib.dump(list(X.columns), FEATURES_PATH)
-print("✅ Saved:", MODEL_PATH, "and", FEATURES_PATH)
+from utils.fast_forest import CompiledForest, save_forest, source_fingerprint
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "data", "Crop_recommendation.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "models", "crop_model.pkl")
+FEATURES_PATH = os.path.join(BASE_DIR, "models", "feature_order.pkl")
+META_PATH = os.path.join(BASE_DIR, "models", "crop_model.meta.json")
+FOREST_PATH = os.path.join(BASE_DIR, "models", "crop_model.forest")
+
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200, 300],
+    "max_depth": [None, 12, 20],
+    "max_leaf_nodes": [None, 64, 256],
+}
+QUICK_GRID = {
+    "n_estimators": [50, 300],
+    "max_depth": [None, 12],
+    "max_leaf_nodes": [None, 64],
+}
+
+
+def base_estimator():
+    # n_jobs stays None: the served model scores tiny inputs, where joblib overhead dominates
+    return RandomForestClassifier(random_state=42, class_weight="balanced_subsample")
+
+
+def serialized_size(model):
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+    return buf.tell()
+
+
+def median_ms(fn, X, repeats):
+    fn(X)
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def profile_candidate(params, X_train, y_train, X_test, y_test, repeats):
+    clf = base_estimator().set_params(**params)
+    t0 = time.perf_counter()
+    clf.fit(X_train, y_train)
+    fit_s = time.perf_counter() - t0
+
+    predictor = CompiledForest(clf)
+    X_single = X_test[:1]
+    X_batch = np.resize(X_test, (1000, X_test.shape[1]))
+    return clf, {
+        "params": params,
+        "holdout_f1_macro": round(f1_score(y_test, clf.predict(X_test), average="macro"), 4),
+        "size_bytes": serialized_size(clf),
+        "latency_single_ms": median_ms(predictor.predict, X_single, repeats),
+        "latency_batch1000_ms": median_ms(predictor.predict, X_batch, max(3, repeats // 10)),
+        "n_nodes": int(predictor.left.size),
+        "fit_s": round(fit_s, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train & select the Objective 1 crop model")
+    ap.add_argument("--quick", action="store_true", help="small grid for a fast run")
+    ap.add_argument("--cv", type=int, default=5)
+    ap.add_argument("--n-jobs", type=int, default=-1, help="parallel CV workers (-1 = all cores)")
+    ap.add_argument("--f1-tolerance", type=float, default=0.005,
+                    help="accept candidates whose CV macro F1 is within this of the best")
+    ap.add_argument("--latency-repeats", type=int, default=50)
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    df = pd.read_csv(DATA_PATH)
+    required = FEATURES + ["label"]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df["label"].astype(str).to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # ---- 1) parallel CV search ----
+    grid = QUICK_GRID if args.quick else PARAM_GRID
+    search = GridSearchCV(
+        base_estimator(), grid, scoring="f1_macro",
+        cv=StratifiedKFold(n_splits=args.cv, shuffle=True, random_state=42),
+        n_jobs=args.n_jobs, refit=False,
+    )
+    t0 = time.perf_counter()
+    search.fit(X_train, y_train)
+    n_candidates = len(search.cv_results_["params"])
+    print(f"✅ CV search: {n_candidates} candidates × {args.cv} folds in {time.perf_counter() - t0:.1f}s")
+
+    cv_scores = search.cv_results_["mean_test_score"]
+    best_cv = float(np.max(cv_scores))
+    shortlist = [(p, float(s)) for p, s in zip(search.cv_results_["params"], cv_scores)
+                 if s >= best_cv - args.f1_tolerance]
+    print(f"✅ Best CV F1 macro {best_cv:.4f}; {len(shortlist)} within tolerance {args.f1_tolerance}")
+
+    # ---- 2) profile the shortlist (sequentially, so timings don't contend) ----
+    profiled = []
+    for params, cv_f1 in shortlist:
+        clf, info = profile_candidate(params, X_train, y_train, X_test, y_test, args.latency_repeats)
+        info["cv_f1_macro"] = round(cv_f1, 4)
+        profiled.append((clf, info))
+        print(f"   {params} cv_f1={cv_f1:.4f} size={info['size_bytes'] / 1e6:.2f}MB "
+              f"single={info['latency_single_ms']}ms batch1000={info['latency_batch1000_ms']}ms")
+
+    # ---- 3) smallest, then fastest ----
+    clf, chosen = min(profiled, key=lambda ci: (ci[1]["size_bytes"],
+                                                ci[1]["latency_single_ms"],
+                                                ci[1]["latency_batch1000_ms"]))
+    print("✅ Chosen:", chosen["params"], "holdout F1 macro:", chosen["holdout_f1_macro"])
+
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(clf, MODEL_PATH)
+    joblib.dump(FEATURES, FEATURES_PATH)
+    save_forest(CompiledForest(clf), FOREST_PATH, source=source_fingerprint(MODEL_PATH))
+
+    with open(DATA_PATH, "rb") as f:
+        data_sha256 = hashlib.sha256(f.read()).hexdigest()
+    meta = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "sklearn_version": sklearn.__version__,
+        "data": {"path": os.path.relpath(DATA_PATH, BASE_DIR), "sha256": data_sha256,
+                 "rows": int(len(df)), "test_size": 0.2},
+        "features": FEATURES,
+        "selection": {"metric": "f1_macro", "cv_folds": args.cv, "best_cv_f1_macro": round(best_cv, 4),
+                      "f1_tolerance": args.f1_tolerance, "rule": "min size_bytes, then latency"},
+        "chosen": chosen,
+        "candidates": [info for _, info in profiled],
+        "grid": grid,
+    }
+    with open(META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print("✅ Saved:", MODEL_PATH, FEATURES_PATH, META_PATH, "and", FOREST_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# utils/compression.py
+# -----------------------------------------------------------------------------
+# gzip / brotli response compression negotiated from Accept-Encoding
+# -----------------------------------------------------------------------------
+# init_compression(app) registers an after_request hook. It compresses JSON
+# and text responses when all of these hold:
+#   * the client accepts br (needs `pip install brotli`) or gzip
+#   * the body is at least min_bytes long, or it is a streamed response
+#     (profit-matrix); each streamed chunk is flushed as soon as it has been
+#     compressed, so clients still get rows progressively
+#   * nothing upstream has already set Content-Encoding
+# Compressible responses always get Vary: Accept-Encoding. Compressed ones get
+# their strong ETag suffixed per encoding ('"abc"' -> '"abc-gzip"'), as
+# RFC 9110 expects of a different representation. etag_matches() accepts
+# either form, so conditional requests still come back 304.
+#
+# Tunables (env):
+#   CROPFIT_COMPRESS            0 disables compression (default 1)
+#   CROPFIT_COMPRESS_MIN_BYTES  smallest body worth compressing (default 1024)
+#   CROPFIT_GZIP_LEVEL          zlib level 1-9 (default 6)
+#   CROPFIT_BROTLI_QUALITY      brotli quality 0-11 (default 4; higher costs a lot more CPU)
+
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/plain", "text/csv", "text/html"}
+ENCODINGS = ("br", "gzip")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class _Encoder:
+    """Incremental compressor with one interface for zlib (gzip framing) and brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so the output can be sent right away."""
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.finish()
+        return self._c.compress(data) + self._c.flush()
+
+
+def etag_variants(etag: str) -> Iterable[str]:
+    """Opaque tag plus the per-encoding tags it may have been sent as."""
+    return [etag] + [f"{etag}-{enc}" for enc in ENCODINGS]
+
+
+def etag_matches(if_none_match, etag: str) -> Optional[str]:
+    """The variant of `etag` that If-None-Match lists, or None."""
+    return next((v for v in etag_variants(etag) if if_none_match.contains_weak(v)), None)
+
+
+class Compressor:
+    def __init__(self, min_bytes: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = {enc: {"responses": 0, "bytes_in": 0, "bytes_out": 0} for enc in ENCODINGS}
+
+    def choose(self, accept_encodings) -> Optional[str]:
+        """Best encoding the client accepts (by q-value, br first on ties), or None."""
+        best, best_q = None, 0.0
+        for enc in ENCODINGS:
+            if enc == "br" and brotli is None:
+                continue
+            q = accept_encodings[enc]
+            if q > best_q:
+                best, best_q = enc, q
+        return best
+
+    def _stream(self, chunks: Iterator, encoder: _Encoder) -> Iterator[bytes]:
+        stats = self.stats[encoder.encoding]
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                out = encoder.chunk(chunk)
+                stats["bytes_in"] += len(chunk)
+                stats["bytes_out"] += len(out)
+                yield out
+        tail = encoder.finish()
+        stats["bytes_out"] += len(tail)
+        yield tail
+
+    def __call__(self, request, response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or "Content-Encoding" in response.headers or request.method == "HEAD"):
+            return response
+        encoding = self.choose(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+            response.response = self._stream(iter(response.response), encoder)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_bytes:
+                return response
+            packed = _Encoder(encoding, self.gzip_level, self.brotli_quality).finish(body)
+            stats = self.stats[encoding]
+            stats["bytes_in"] += len(body)
+            stats["bytes_out"] += len(packed)
+            response.set_data(packed)
+        self.stats[encoding]["responses"] += 1
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+
+def init_compression(app) -> Optional[Compressor]:
+    """Register the compression hook on `app` (unless CROPFIT_COMPRESS=0)."""
+    if os.environ.get("CROPFIT_COMPRESS", "1") == "0":
+        return None
+    from flask import request
+
+    compressor = Compressor(min_bytes=_env_int("CROPFIT_COMPRESS_MIN_BYTES", 1024),
+                            gzip_level=_env_int("CROPFIT_GZIP_LEVEL", 6),
+                            brotli_quality=_env_int("CROPFIT_BROTLI_QUALITY", 4))
+    app.after_request(lambda response: compressor(request, response))
+    print(f"✅ Response compression: {'br, ' if brotli is not None else ''}gzip "
+          f"(min {compressor.min_bytes} bytes)")
+    return compressor
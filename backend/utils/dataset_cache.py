@@ -0,0 +1,98 @@
+# utils/dataset_cache.py
+# -----------------------------------------------------------------------------
+# Cleaned binary snapshots of CSV datasets (NumPy .npz, category-coded strings)
+# -----------------------------------------------------------------------------
+# A snapshot lives next to its CSV ("<name>.cache.npz") and records the CSV's
+# size, mtime and SHA-256. It is reused while the CSV is unchanged: a matching
+# size+mtime is trusted outright, otherwise the hash decides (so a `touch` or a
+# fresh checkout doesn't force a re-parse). Bump SNAPSHOT_VERSION whenever the
+# cleaning logic changes so old snapshots are ignored.
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+_META_KEY = "__meta__"
+
+
+def snapshot_path(csv_path: str) -> str:
+    root, _ = os.path.splitext(csv_path)
+    return root + ".cache.npz"
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _csv_fingerprint(csv_path: str, with_hash: bool) -> dict:
+    st = os.stat(csv_path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        fp["sha256"] = _file_sha256(csv_path)
+    return fp
+
+
+def load_frame_snapshot(csv_path: str) -> Optional[pd.DataFrame]:
+    """Return the cleaned frame from the snapshot, or None if missing/stale."""
+    path = snapshot_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+
+    with np.load(path, allow_pickle=False) as npz:
+        meta = json.loads(str(npz[_META_KEY]))
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        src = meta.get("source", {})
+        fp = _csv_fingerprint(csv_path, with_hash=False)
+        if (fp["size"], fp["mtime_ns"]) != (src.get("size"), src.get("mtime_ns")):
+            if fp["size"] != src.get("size") or _file_sha256(csv_path) != src.get("sha256"):
+                return None
+
+        cols = {}
+        for col in meta["columns"]:
+            name, kind = col["name"], col["kind"]
+            if kind == "category":
+                categories = npz[f"{name}.categories"].astype(object)
+                cols[name] = categories[npz[f"{name}.codes"]]
+            else:
+                cols[name] = npz[name]
+    return pd.DataFrame(cols, columns=[c["name"] for c in meta["columns"]])
+
+
+def save_frame_snapshot(df: pd.DataFrame, csv_path: str) -> str:
+    """Write df as a snapshot bound to the current csv_path contents."""
+    arrays, columns = {}, []
+    for name in df.columns:
+        s = df[name]
+        if s.dtype == object or isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s.dtype):
+            codes, categories = pd.factorize(s.astype(str), sort=True)
+            arrays[f"{name}.codes"] = codes.astype(np.int32)
+            arrays[f"{name}.categories"] = np.asarray(categories, dtype=str)
+            columns.append({"name": name, "kind": "category"})
+        else:
+            arrays[name] = s.to_numpy()
+            columns.append({"name": name, "kind": "numeric"})
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source": _csv_fingerprint(csv_path, with_hash=True),
+        "columns": columns,
+    }
+    arrays[_META_KEY] = np.array(json.dumps(meta))
+
+    path = snapshot_path(csv_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)  # atomic: concurrent readers see old or new, never partial
+    return path
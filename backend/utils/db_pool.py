@@ -0,0 +1,125 @@
+# utils/db_pool.py
+# -----------------------------------------------------------------------------
+# Per-thread pooled SQLite connections (auth DB, read-only yield DB)
+# -----------------------------------------------------------------------------
+# Each thread keeps one open connection instead of connecting per request.
+# Every connection gets the same PRAGMAs:
+#   journal_mode=WAL     readers never block on a writer (persisted in the DB file)
+#   synchronous=NORMAL   fsync at checkpoints, not every commit (safe with WAL)
+#   busy_timeout         wait for the write lock instead of failing with "database is locked"
+# and a larger prepared-statement cache (cached_statements).
+#
+# The schema callback runs once per process, on the first connection, so
+# importing app.py never touches the database. A connection inherited across
+# a fork is never reused by the child; it opens its own.
+#
+# read_only=True opens the file with mode=ro and skips the write PRAGMAs
+# (utils/yield_store.py, whose DB is rebuilt off to the side and swapped in).
+# on_connect runs on every new connection, e.g. to register SQL functions.
+#
+# Tunables (env): CROPFIT_DB_BUSY_TIMEOUT_MS (default 5000),
+#                 CROPFIT_DB_SYNCHRONOUS (default NORMAL)
+
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Callable, Optional
+
+_SYNC_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+class _Slot:
+    """Holds one thread's connection; closes it when the thread's locals go away."""
+
+    def __init__(self, conn: sqlite3.Connection, pid: int):
+        self.conn = conn
+        self.pid = pid
+
+    def close(self):
+        conn, self.conn = self.conn, None
+        if conn is not None and self.pid == os.getpid():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def __del__(self):
+        self.close()
+
+
+class SQLitePool:
+    def __init__(self, path: str, init_schema: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 busy_timeout_ms: Optional[int] = None, synchronous: Optional[str] = None,
+                 cached_statements: int = 256, read_only: bool = False,
+                 on_connect: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.path = path
+        self.read_only = read_only
+        self.on_connect = on_connect
+        self.init_schema = init_schema
+        self.busy_timeout_ms = int(busy_timeout_ms if busy_timeout_ms is not None
+                                   else os.environ.get("CROPFIT_DB_BUSY_TIMEOUT_MS", 5000))
+        sync = (synchronous or os.environ.get("CROPFIT_DB_SYNCHRONOUS", "NORMAL")).upper()
+        self.synchronous = sync if sync in _SYNC_MODES else "NORMAL"
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._slots: "weakref.WeakSet[_Slot]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._schema_pid = None
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close_all() can close from the shutdown
+        # thread; each connection is otherwise used by the thread that owns it.
+        target = f"file:{self.path}?mode=ro" if self.read_only else self.path
+        conn = sqlite3.connect(target, timeout=self.busy_timeout_ms / 1000, uri=self.read_only,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        if not self.read_only:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        if self.on_connect is not None:
+            self.on_connect(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        pid = os.getpid()
+        if self._schema_pid == pid or self.init_schema is None:
+            return
+        with self._lock:
+            if self._schema_pid != pid:
+                self.init_schema(conn)
+                self._schema_pid = pid
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)."""
+        slot = getattr(self._local, "slot", None)
+        if slot is None or slot.conn is None or slot.pid != os.getpid():
+            slot = _Slot(self._open(), os.getpid())
+            self._local.slot = slot
+            with self._lock:
+                self._slots.add(slot)
+        self._ensure_schema(slot.conn)
+        return slot.conn
+
+    def release(self):
+        """End of request: roll back anything left open; the connection stays pooled."""
+        slot = getattr(self._local, "slot", None)
+        if slot is not None and slot.conn is not None and slot.pid == os.getpid():
+            if slot.conn.in_transaction:
+                slot.conn.rollback()
+
+    def close_all(self):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot.close()
+
+
+def create_pool(path: str, init_schema=None, **kwargs) -> SQLitePool:
+    """SQLitePool whose connections are closed at interpreter exit."""
+    pool = SQLitePool(path, init_schema=init_schema, **kwargs)
+    atexit.register(pool.close_all)
+    return pool
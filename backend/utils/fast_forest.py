@@ -0,0 +1,210 @@
+# utils/fast_forest.py
+# -----------------------------------------------------------------------------
+# Flat-array inference for fitted sklearn forest classifiers (Objective 1)
+# -----------------------------------------------------------------------------
+# All trees are packed into one set of contiguous node arrays and traversed
+# for every (tree, sample) pair at once, one tree level per NumPy step. This
+# skips sklearn's per-call validation and per-tree dispatch, which dominate
+# the cost of scoring a single 7-feature row.
+#
+# Results are bit-identical to model.predict / model.predict_proba:
+#   - X is rounded to float32 first, exactly as sklearn does
+#   - comparisons are X[f] <= threshold (float32 promoted to float64)
+#   - NaN features follow each split's missing_go_to_left, as in sklearn >= 1.3
+#     (older sklearn has no missing-value routing; NaN compares false and goes right)
+#   - per-tree leaf probabilities are reused as sklearn computes them and
+#     summed in tree order, then divided by the number of trees
+#
+# NumPy gathers beat sklearn's fixed per-call overhead only for small inputs;
+# past roughly 150-200 rows sklearn's compiled tree loop is faster. Batches
+# above `max_batch` rows therefore go to the original model. Both paths
+# give identical results, so the switch can't be observed in the output.
+#
+# save_forest()/load_forest() persist the flat arrays as raw .npy files that
+# load with mmap_mode="r": every worker on a host then shares one copy of
+# the tree arrays through the page cache. A memory-mapped forest has no
+# sklearn model behind it, so large batches run through the flat path in
+# max_batch-row chunks instead.
+
+import json
+import os
+import shutil
+from typing import Optional
+
+import numpy as np
+
+try:
+    import sklearn
+    _SKLEARN_VERSION = tuple(int(p) for p in sklearn.__version__.split(".")[:2])
+except Exception:  # sklearn absent: nothing to compile anyway
+    _SKLEARN_VERSION = (0, 0)
+
+
+_ARRAYS = ("left", "right", "feature", "threshold", "missing_left", "value", "roots", "is_leaf", "classes_")
+FOREST_FORMAT_VERSION = 2
+
+
+class CompiledForest:
+    """Drop-in predict/predict_proba for a fitted forest of single-output classifier trees."""
+
+    def __init__(self, model, max_batch: int = 128):
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("expected a fitted single-output forest classifier")
+
+        self.model = model
+        self.classes_ = model.classes_
+        self.n_classes = int(model.n_classes_)
+        self.n_features = int(model.n_features_in_)
+        self.n_trees = len(estimators)
+        self.max_batch = max_batch
+
+        left, right, feature, threshold, missing_left, value, roots = [], [], [], [], [], [], []
+        offset, depth = 0, 0
+        for est in estimators:
+            t = est.tree_
+            n = t.node_count
+            idx = np.arange(n, dtype=np.int64)
+            is_leaf = t.children_left == -1
+
+            # Leaves point at themselves with threshold +inf, so extra steps are no-ops.
+            left.append(np.where(is_leaf, idx, t.children_left) + offset)
+            right.append(np.where(is_leaf, idx, t.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, t.feature).astype(np.int64))
+            threshold.append(np.where(is_leaf, np.inf, t.threshold))
+            go_left = getattr(t, "missing_go_to_left", None)
+            missing_left.append(np.zeros(n, dtype=bool) if go_left is None
+                                else np.asarray(go_left, dtype=bool) & ~is_leaf)
+
+            v = np.asarray(t.value[:, 0, :self.n_classes], dtype=np.float64)
+            if _SKLEARN_VERSION < (1, 4):
+                # older sklearn stores weighted counts and normalizes in predict_proba
+                normalizer = v.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                v = v / normalizer
+            value.append(v)
+
+            roots.append(offset)
+            depth = max(depth, int(t.max_depth))
+            offset += n
+
+        self.left = np.ascontiguousarray(np.concatenate(left))
+        self.right = np.ascontiguousarray(np.concatenate(right))
+        self.feature = np.ascontiguousarray(np.concatenate(feature))
+        self.threshold = np.ascontiguousarray(np.concatenate(threshold))
+        self.missing_left = np.ascontiguousarray(np.concatenate(missing_left))
+        self.value = np.ascontiguousarray(np.concatenate(value))
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.is_leaf = self.left == np.arange(offset)
+        self.max_depth = depth
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index per (tree, sample), shape (n_trees, n_samples)."""
+        n, n_features = X.shape
+        flat_x = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * n_features)[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], n, axis=1)
+        has_nan = bool(np.isnan(flat_x).any())
+        for level in range(self.max_depth):
+            x = flat_x[row_base + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            # most trees are far shallower than the deepest one
+            if level >= 8 and level % 4 == 0 and self.is_leaf[node].all():
+                break
+        return node
+
+    def _proba_flat(self, X: np.ndarray) -> np.ndarray:
+        # Reducing over the outer (tree) axis adds tree slabs in order, i.e. the
+        # same sequence of float additions as sklearn's `all_proba += ...` loop.
+        proba = self.value[self._leaves(X)].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"expected shape (n_samples, {self.n_features}), got {X.shape}")
+        if self.model is not None and X.shape[0] > self.max_batch:
+            return self.model.predict_proba(X)
+        X = X.astype(np.float64)  # exact widening; matches sklearn's float32-vs-float64 compare
+        if X.shape[0] <= self.max_batch:
+            return self._proba_flat(X)
+        return np.concatenate([self._proba_flat(X[i:i + self.max_batch])
+                               for i in range(0, X.shape[0], self.max_batch)])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def save_forest(forest: CompiledForest, path: str, source: Optional[dict] = None) -> str:
+    """
+    Write forest arrays as raw .npy files in directory `path` (replaced atomically).
+    `source` is free-form provenance (e.g. the pickle's size/mtime) stored in meta.json.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in _ARRAYS:
+        arr = np.asarray(getattr(forest, name))
+        if arr.dtype == object:  # string class labels; .npy needs a fixed-width dtype
+            arr = arr.astype(str)
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr), allow_pickle=False)
+    meta = {
+        "format_version": FOREST_FORMAT_VERSION,
+        "n_trees": forest.n_trees, "n_classes": forest.n_classes,
+        "n_features": forest.n_features, "max_depth": forest.max_depth,
+        "source": source or {},
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    old = f"{path}.{os.getpid()}.old"
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def source_fingerprint(model_path: str) -> dict:
+    """Size + mtime of the pickle a saved forest was exported from."""
+    st = os.stat(model_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def read_forest_meta(path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format_version") == FOREST_FORMAT_VERSION else None
+
+
+def load_forest(path: str, mmap: bool = True, max_batch: int = 128) -> CompiledForest:
+    """Load a saved forest; with mmap=True the arrays are read-only views of the files."""
+    meta = read_forest_meta(path)
+    if meta is None:
+        raise ValueError(f"no compatible forest at {path}")
+    forest = CompiledForest.__new__(CompiledForest)
+    for name in _ARRAYS:
+        setattr(forest, name, np.load(os.path.join(path, f"{name}.npy"),
+                                      mmap_mode="r" if mmap else None, allow_pickle=False))
+    forest.model = None
+    forest.max_batch = max_batch
+    forest.n_trees = int(meta["n_trees"])
+    forest.n_classes = int(meta["n_classes"])
+    forest.n_features = int(meta["n_features"])
+    forest.max_depth = int(meta["max_depth"])
+    return forest
+
+
+def compile_forest(model, max_batch: int = 128) -> Optional[CompiledForest]:
+    """CompiledForest for model, or None if the model isn't a supported forest."""
+    try:
+        return CompiledForest(model, max_batch=max_batch)
+    except Exception:
+        return None
@@ -0,0 +1,85 @@
+# utils/json_provider.py
+# -----------------------------------------------------------------------------
+# Flask JSON provider: orjson when installed, NumPy-aware either way
+# -----------------------------------------------------------------------------
+# jsonify(), request.get_json() and app.json.dumps() all go through app.json.
+# FastJSONProvider serializes with orjson (pip install orjson), which is
+# several times faster than the stdlib encoder. orjson also writes NumPy
+# scalars and arrays natively, so handlers can return np.float64 / np.int64 /
+# ndarray values without float()/int()/tolist() casts.
+#
+# Without orjson, or for anything orjson rejects (e.g. ints over 64 bits),
+# it falls back to Flask's stdlib provider, with NumPy types handled in
+# default(). Output is the same JSON either way, with two differences:
+#   * orjson writes non-ASCII as UTF-8 instead of \uXXXX escapes
+#   * orjson writes NaN/Infinity as null (valid JSON) instead of NaN
+
+import json
+from typing import Any, Optional
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def _numpy_default(o: Any) -> Any:
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return DefaultJSONProvider.default(o)
+
+
+def _orjson_default(o: Any) -> Any:
+    # orjson handles numpy itself (OPT_SERIALIZE_NUMPY) but not every dtype/layout
+    if isinstance(o, tuple):
+        return list(o)
+    return _numpy_default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_numpy_default)
+    use_orjson = orjson is not None
+
+    def _orjson_options(self, indent: bool, sort_keys: bool) -> int:
+        opts = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        if indent:
+            opts |= orjson.OPT_INDENT_2
+        return opts
+
+    def dumps_bytes(self, obj: Any, indent: bool = False, sort_keys: Optional[bool] = None) -> bytes:
+        """Compact UTF-8 JSON bytes; the fast path used by response() and streaming endpoints."""
+        sort_keys = self.sort_keys if sort_keys is None else sort_keys
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=_orjson_default, option=self._orjson_options(indent, sort_keys))
+            except TypeError:  # includes orjson.JSONEncodeError; retry with the stdlib encoder
+                pass
+        kwargs = {"indent": 2} if indent else {"separators": (",", ":")}
+        return super().dumps(obj, sort_keys=sort_keys, **kwargs).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs or not self.use_orjson:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs or not self.use_orjson:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return json.loads(s)  # NaN, Infinity and the other stdlib extensions
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
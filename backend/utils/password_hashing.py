@@ -0,0 +1,170 @@
+# utils/password_hashing.py
+# -----------------------------------------------------------------------------
+# Password hashing/verification on a bounded process pool (auth endpoints)
+# -----------------------------------------------------------------------------
+# scrypt/pbkdf2 are CPU-bound on purpose. Run on a request thread they hold
+# the GIL and starve every other endpoint in the worker, so they run on a
+# small ProcessPoolExecutor instead. A semaphore caps queued + running jobs:
+# past the cap a caller gets PasswordPoolBusy at once (the API answers 503)
+# rather than waiting in an unbounded queue. A job keeps its slot until it
+# has actually finished, even if its caller gave up waiting (timeout).
+#
+# Every gunicorn worker has its own pool, so the default pool size splits
+# the host's cores across the workers serve.py starts (CROPFIT_WORKERS):
+# cores // max(2, workers) processes each, i.e. cores/2 for a single process
+# and one per worker once there are as many workers as cores.
+#
+# Cost parameters live in the werkzeug method string ("scrypt:N:r:p",
+# "pbkdf2:sha256:iterations"), which is stored in front of every hash
+# ("<method>$<salt>$<hash>"). needs_rehash() compares a stored hash with the
+# configured method so logins can upgrade old hashes after a cost change.
+#
+# Tunables (env):
+#   CROPFIT_PASSWORD_HASH_METHOD  werkzeug method incl. cost (default scrypt:32768:8:1)
+#   CROPFIT_HASH_WORKERS          pool processes per app process (default above; 0 = inline)
+#   CROPFIT_HASH_QUEUE            max queued + running jobs (default 8 per worker)
+#   CROPFIT_HASH_TIMEOUT_S        max wait for a result (default 10)
+
+import os
+import sys
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class PasswordPoolBusy(Exception):
+    """Hash queue full, pool broken or result too slow; callers should answer 503."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def default_pool_size() -> int:
+    """Hash processes per app process when CROPFIT_HASH_WORKERS is unset."""
+    app_processes = max(1, _env_int("CROPFIT_WORKERS", 1))
+    return max(1, (os.cpu_count() or 2) // max(2, app_processes))
+
+
+def hash_method() -> str:
+    return os.environ.get("CROPFIT_PASSWORD_HASH_METHOD", DEFAULT_METHOD).strip() or DEFAULT_METHOD
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True if stored_hash was made with different cost parameters than configured."""
+    return (stored_hash or "").split("$", 1)[0] != hash_method()
+
+
+# ---- run inside pool processes (module-level so they pickle) ----
+def _hash_job(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+
+def _verify_job(stored_hash: str, password: str) -> bool:
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    def __init__(self, workers: Optional[int] = None, queue_limit: Optional[int] = None,
+                 timeout_s: Optional[float] = None):
+        self.workers = max(0, workers if workers is not None
+                           else _env_int("CROPFIT_HASH_WORKERS", default_pool_size()))
+        self.queue_limit = max(1, queue_limit if queue_limit is not None
+                               else _env_int("CROPFIT_HASH_QUEUE", 8 * max(1, self.workers)))
+        self.timeout_s = float(timeout_s if timeout_s is not None
+                               else os.environ.get("CROPFIT_HASH_TIMEOUT_S", 10))
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"submitted": 0, "rejected": 0, "timeouts": 0, "broken": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # fork: workers need nothing but werkzeug.security, already imported here,
+                # and fork doesn't re-run the app's __main__ the way spawn does
+                method = "fork" if sys.platform.startswith("linux") else None
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=mp.get_context(method))
+            return self._pool
+
+    def start(self):
+        """Start the pool processes now, e.g. in a fresh worker before it spawns threads."""
+        if self.workers:
+            self._executor().submit(_verify_job, "", "").result()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.stats["rejected"] += 1
+            raise PasswordPoolBusy("password hashing queue is full")
+        self.stats["submitted"] += 1
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._executor().submit(fn, *args)
+        except BaseException as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                return self._broken()
+            raise
+        # the slot is freed when the job ends (done, failed or cancelled), not when we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeout:
+            self.stats["timeouts"] += 1
+            raise PasswordPoolBusy("password hashing timed out")
+        except BrokenProcessPool:
+            return self._broken()
+
+    def _broken(self):
+        self.stats["broken"] += 1
+        self.shutdown()  # next call starts a fresh pool
+        raise PasswordPoolBusy("password hashing pool restarted")
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_job, password, hash_method())
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        return self._run(_verify_job, stored_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_HASHER: Optional[PasswordHasher] = None
+_HASHER_PID: Optional[int] = None
+_HASHER_LOCK = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    """Process-wide hasher; a forked child builds its own instead of sharing the parent's pool."""
+    global _HASHER, _HASHER_PID
+    if _HASHER is None or _HASHER_PID != os.getpid():
+        with _HASHER_LOCK:
+            if _HASHER is None or _HASHER_PID != os.getpid():
+                _HASHER, _HASHER_PID = PasswordHasher(), os.getpid()
+    return _HASHER
+
+
+def hash_password(password: str) -> str:
+    return get_hasher().hash(password)
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    return get_hasher().verify(stored_hash, password)
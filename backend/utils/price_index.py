@@ -0,0 +1,214 @@
+# utils/price_index.py
+# -----------------------------------------------------------------------------
+# Crop price/cost index for Objective 4 (profit-estimate, profit-matrix)
+# -----------------------------------------------------------------------------
+# Crop names differ between sources:
+#   district_crop_yield.csv  rice, pigeonpea, chickpea, jowar, ...
+#   Crop_recommendation.csv  pigeonpeas, mungbean, blackgram, ...
+#   cycle_data               gram, pulses, millets, sorghum, ...
+#   price_cost_reference.csv "Paddy (Rice)", "Tur/Arhar", "Chickpea (Gram)", ...
+# canonical_crop() maps all of them onto one canonical name (the yield
+# dataset's spelling where it has one), and PriceIndex stores one entry per
+# canonical crop, so a lookup is a single dict hit.
+#
+# Price and cost are resolved independently, so a reference row with a
+# blank MSP still supplies its cost:
+#   price_cost_reference.csv > internal fallback table > generic default.
+
+import csv
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+REFERENCE_NOTE = "From price_cost_reference.csv"
+FALLBACK_NOTE = "Fallback internal reference (demo)"
+DEFAULT_NOTE = "Generic defaults (demo)"
+DEFAULT_PRICE_COST = (2500.0, 50000.0)
+
+# alias -> canonical crop. Group names from cycle_data are priced through a
+# representative crop ("pulses" -> tur/arhar, "millets" -> bajra).
+CROP_SYNONYMS: Dict[str, str] = {
+    "paddy": "rice",
+    "pigeonpeas": "pigeonpea", "pigeon pea": "pigeonpea", "tur": "pigeonpea",
+    "arhar": "pigeonpea", "toor": "pigeonpea", "red gram": "pigeonpea", "redgram": "pigeonpea",
+    "pulses": "pigeonpea",
+    "gram": "chickpea", "bengal gram": "chickpea", "chana": "chickpea",
+    "sorghum": "jowar",
+    "millets": "bajra", "pearl millet": "bajra",
+    "finger millet": "ragi",
+    "moong": "mungbean", "mung": "mungbean", "green gram": "mungbean",
+    "urad": "blackgram", "black gram": "blackgram",
+    "soyabean": "soybean", "soya": "soybean",
+    "rapeseed": "mustard", "rapeseed & mustard": "mustard", "rapeseed and mustard": "mustard",
+    "peanut": "groundnut",
+    "kidney beans": "kidneybeans", "rajma": "kidneybeans",
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def _clean(name: str) -> str:
+    return _SPACES.sub(" ", str(name or "").strip().lower())
+
+
+def _variants(key: str) -> List[str]:
+    """'paddy (rice)' -> ['paddy (rice)', 'paddy', 'rice']; 'tur/arhar' -> [.., 'tur', 'arhar']."""
+    out = [key]
+    m = re.match(r"^(.*?)\s*\((.*?)\)\s*$", key)
+    if m:
+        out += [m.group(1).strip(), m.group(2).strip()]
+    for part in list(out):
+        if "/" in part:
+            out += [p.strip() for p in part.split("/") if p.strip()]
+    return out
+
+
+def canonical_crop(name: str) -> str:
+    """Canonical crop name for any spelling used in the datasets or reference table."""
+    key = _clean(name)
+    variants = _variants(key)
+    for v in variants:
+        if v in CROP_SYNONYMS:
+            return CROP_SYNONYMS[v]
+    # "Jowar (Hybrid)" -> "jowar": the first variant that isn't a qualifier
+    return variants[1] if len(variants) > 1 else key
+
+
+# ----------------------------- CSV reading ------------------------------------
+_COLUMNS = ["crop", "price_rs_per_quintal", "price_source", "price_note", "cost_rs_per_hectare", "cost_note"]
+
+
+def _to_number(text: str) -> Optional[float]:
+    try:
+        return float(str(text).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _merge_parens(fields: List[str]) -> List[str]:
+    """Re-join fields an unquoted comma split inside '( ... )'."""
+    out: List[str] = []
+    for f in fields:
+        if out and out[-1].count("(") > out[-1].count(")"):
+            out[-1] = f"{out[-1]},{f}"
+        else:
+            out.append(f)
+    return out
+
+
+def _split_row(fields: List[str]) -> Optional[dict]:
+    """Map one over-long row (unquoted commas in the text columns) onto _COLUMNS."""
+    fields = [f.strip() for f in _merge_parens(fields)]
+    # cost is the last numeric field after the price; its note is everything behind it
+    cost_at = next((i for i in range(len(fields) - 1, 1, -1) if _to_number(fields[i]) is not None), None)
+    if cost_at is None:
+        return None
+    middle = fields[2:cost_at]
+    return {
+        "crop": fields[0],
+        "price_rs_per_quintal": fields[1],
+        "price_source": middle[0] if middle else "",
+        "price_note": ", ".join(middle[1:]).strip(", "),
+        "cost_rs_per_hectare": fields[cost_at],
+        "cost_note": ", ".join(fields[cost_at + 1:]),
+    }
+
+
+def read_price_reference(path: str) -> pd.DataFrame:
+    """
+    Parse price_cost_reference.csv into one row per reference entry with
+    columns Crop (canonical), name, price_rs_per_quintal, cost_rs_per_hectare,
+    price_source, price_note, cost_note. Tolerates a lowercase header and
+    unquoted commas in the text columns.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = [r for r in csv.reader(f) if any(c.strip() for c in r)]
+    if not rows:
+        return pd.DataFrame(columns=["Crop", "name"] + _COLUMNS[1:])
+
+    header = [_clean(h) for h in rows[0]]
+    records = []
+    for r in rows[1:]:
+        if len(r) == len(header):
+            rec = dict(zip(header, (c.strip() for c in r)))
+        elif len(r) > len(header) and header[:2] == _COLUMNS[:2]:
+            rec = _split_row(r)
+        else:
+            rec = None
+        if rec and rec.get("crop"):
+            records.append(rec)
+
+    df = pd.DataFrame.from_records(records).reindex(columns=_COLUMNS)
+    df = df.rename(columns={"crop": "name"})
+    df["name"] = df["name"].astype(str).str.strip()
+    df.insert(0, "Crop", [canonical_crop(n) for n in df["name"]])
+    for col in ["price_rs_per_quintal", "cost_rs_per_hectare"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    for col in ["price_source", "price_note", "cost_note"]:
+        df[col] = df[col].fillna("").astype(str)
+    return df
+
+
+# ------------------------------ Index -----------------------------------------
+class PriceCost(NamedTuple):
+    price: float        # Rs/quintal
+    cost: float         # Rs/ha
+    price_note: str     # provenance of price
+    cost_note: str      # provenance of cost
+
+
+def _reference_note(name: str, detail: str) -> str:
+    detail = detail.strip()
+    return f"{REFERENCE_NOTE} ({name}; {detail})" if detail else f"{REFERENCE_NOTE} ({name})"
+
+
+class PriceIndex:
+    """canonical crop -> PriceCost, built once per data load."""
+
+    def __init__(self, reference: Optional[pd.DataFrame] = None,
+                 fallback: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.entries: Dict[str, PriceCost] = {}
+        price: Dict[str, Tuple[float, str]] = {}
+        cost: Dict[str, Tuple[float, str]] = {}
+
+        if reference is not None and not reference.empty:
+            for crop, name, p, c, src, pnote, cnote in reference[
+                    ["Crop", "name", "price_rs_per_quintal", "cost_rs_per_hectare",
+                     "price_source", "price_note", "cost_note"]].itertuples(index=False):
+                if pd.notna(p) and crop not in price:   # first row wins, as before
+                    price[crop] = (float(p), _reference_note(name, src))
+                if pd.notna(c) and crop not in cost:
+                    cost[crop] = (float(c), _reference_note(name, cnote))
+
+        for raw, (p, c) in (fallback or {}).items():
+            crop = canonical_crop(raw)
+            price.setdefault(crop, (float(p), FALLBACK_NOTE))
+            cost.setdefault(crop, (float(c), FALLBACK_NOTE))
+
+        default_p, default_c = DEFAULT_PRICE_COST
+        for crop in set(price) | set(cost):
+            p, pn = price.get(crop, (default_p, DEFAULT_NOTE))
+            c, cn = cost.get(crop, (default_c, DEFAULT_NOTE))
+            self.entries[crop] = PriceCost(p, c, pn, cn)
+        self.default = PriceCost(default_p, default_c, DEFAULT_NOTE, DEFAULT_NOTE)
+
+        # every known spelling -> entry, so aliases are dict hits too
+        names = list(CROP_SYNONYMS) + list(fallback or {})
+        if reference is not None and not reference.empty:
+            names += [_clean(n) for n in reference["name"]]
+        self._by_name: Dict[str, PriceCost] = dict(self.entries)
+        for name in names:
+            entry = self.entries.get(canonical_crop(name))
+            if entry is not None:
+                self._by_name.setdefault(name, entry)
+
+    def lookup(self, crop: str) -> PriceCost:
+        """Price/cost for any spelling of a crop (generic defaults if unknown)."""
+        hit = self._by_name.get(crop)
+        if hit is None:
+            hit = self.entries.get(canonical_crop(crop), self.default)
+        return hit
+
+    def lookup_many(self, crops: Iterable[str]) -> List[PriceCost]:
+        return [self.lookup(c) for c in crops]
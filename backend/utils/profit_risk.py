@@ -0,0 +1,74 @@
+# utils/profit_risk.py
+# -----------------------------------------------------------------------------
+# Monte Carlo profit risk for Objective 4 (profit-estimate risk mode, profit-risk)
+# -----------------------------------------------------------------------------
+# For each crop, profit per draw is
+#     yield × area × price − area × cost
+# where:
+#   yield  bootstrap draw from that district/crop's recorded yields (one per year)
+#   price  uniform in price × (1 ± price_band)
+#   cost   uniform in cost × (1 ± cost_band)   (band 0 = fixed cost)
+#
+# All crops are simulated together as (n_crops, n_draws) arrays: one gather
+# for yields, one RNG call per factor, and a single percentile pass. Crops
+# are processed in blocks of at most MAX_BLOCK_ELEMENTS values to bound
+# memory.
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+PERCENTILES = (10, 50, 90)
+MAX_BLOCK_ELEMENTS = 2_000_000
+
+
+def _simulate_block(values, starts, lengths, price, cost, area_ha, draws,
+                    price_band, cost_band, rng) -> Dict[str, np.ndarray]:
+    k = len(starts)
+    pick = rng.integers(0, lengths[:, None], (k, draws))
+    pick += starts[:, None]
+    y = values[pick]
+    p = price[:, None] * (1.0 + price_band * rng.uniform(-1.0, 1.0, (k, draws)))
+    if cost_band:
+        c = cost[:, None] * (1.0 + cost_band * rng.uniform(-1.0, 1.0, (k, draws)))
+    else:
+        c = cost[:, None]
+    profit = y * area_ha * p - area_ha * c
+    pct = np.percentile(profit, PERCENTILES, axis=1)
+    out = {f"p{q}": pct[i] for i, q in enumerate(PERCENTILES)}
+    out["mean"] = profit.mean(axis=1)
+    out["std"] = profit.std(axis=1)
+    out["prob_loss"] = (profit < 0).mean(axis=1)
+    return out
+
+
+def simulate_profit(yield_samples: Sequence[np.ndarray], price: Sequence[float], cost: Sequence[float],
+                    area_ha: float = 1.0, draws: int = 20000, price_band: float = 0.15,
+                    cost_band: float = 0.0, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Simulate profit (Rs) for several crops at once.
+    yield_samples[i] are crop i's recorded yields (q/ha); price[i] in Rs/quintal;
+    cost[i] in Rs/ha. Returns arrays aligned with the inputs:
+      p10, p50, p90, mean, std, prob_loss,
+      breakeven_price (Rs/q at mean yield), breakeven_yield (q/ha at the reference price)
+    """
+    lengths = np.asarray([len(s) for s in yield_samples], dtype=np.int64)
+    if lengths.size == 0 or (lengths == 0).any():
+        raise ValueError("every crop needs at least one yield record")
+    values = np.concatenate([np.asarray(s, dtype=np.float64) for s in yield_samples])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    price = np.asarray(price, dtype=np.float64)
+    cost = np.asarray(cost, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    block = max(1, MAX_BLOCK_ELEMENTS // max(draws, 1))
+    parts = [_simulate_block(values, starts[i:i + block], lengths[i:i + block], price[i:i + block],
+                             cost[i:i + block], area_ha, draws, price_band, cost_band, rng)
+             for i in range(0, len(lengths), block)]
+    out = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    mean_yield = np.asarray([np.mean(s) for s in yield_samples], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["breakeven_price"] = np.where(mean_yield > 0, cost / mean_yield, np.inf)
+        out["breakeven_yield"] = np.where(price > 0, cost / price, np.inf)
+    return out
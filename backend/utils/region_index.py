@@ -0,0 +1,174 @@
+# utils/region_index.py
+# -----------------------------------------------------------------------------
+# State / district name resolution and autocomplete (Objective 3/4)
+# -----------------------------------------------------------------------------
+# User input rarely matches the dataset's Title Case names exactly:
+#   "Bengaluru urban", "Tamilnadu", "Prayagraj/Allahabad", "maharastra", "J&K"
+# Every name is reduced to a key (lowercase, "&" -> "and", punctuation
+# dropped, known old names replaced), and to a compact key with the spaces
+# removed as well. Two indexes are then built once per dataset load:
+#   * a sorted list of compact keys of every word-start suffix, searched with
+#     bisect. This is a flat trie: a prefix lookup is one binary search.
+#   * a character trigram -> entry ids inverted index. Fuzzy matching scores
+#     only the entries that share a trigram with the query (Dice coefficient).
+# With about 300 entries, a lookup takes a few microseconds for exact or
+# prefix hits and well under 1 ms for a fuzzy match.
+
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+# old / alternate names -> dataset spelling, applied word by word
+NAME_ALIASES: Dict[str, str] = {
+    "allahabad": "prayagraj", "bangalore": "bengaluru", "mysore": "mysuru",
+    "belgaum": "belagavi", "gulbarga": "kalaburagi", "bellary": "ballari",
+    "shimoga": "shivamogga", "tumkur": "tumakuru", "bijapur": "vijayapura",
+    "bagalkot": "bagalkote", "orissa": "odisha", "gurgaon": "gurugram",
+    "bombay": "mumbai", "madras": "chennai", "calcutta": "kolkata",
+    "trivandrum": "thiruvananthapuram", "poona": "pune", "baroda": "vadodara",
+    "uttaranchal": "uttarakhand",
+}
+# whole-key aliases (abbreviations and multi-word variants)
+KEY_ALIASES: Dict[str, str] = {
+    "nct delhi": "delhi", "delhi nct": "delhi", "nct of delhi": "delhi", "new delhi": "delhi",
+    "j and k": "jammu and kashmir", "jk": "jammu and kashmir",
+    "up": "uttar pradesh", "mp": "madhya pradesh", "ap": "andhra pradesh",
+    "hp": "himachal pradesh", "wb": "west bengal", "tn": "tamil nadu",
+}
+
+MIN_FUZZY_SCORE = 0.5    # resolve(): least trigram similarity accepted
+MIN_FUZZY_GAP = 0.1      # resolve(): lead over the runner-up needed to pick one
+MIN_SEARCH_SCORE = 0.3   # search(): least similarity listed
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def region_key(text: str) -> str:
+    """'Bangalore  Urban' -> 'bengaluru urban'; 'J&K' -> 'jammu and kashmir'."""
+    key = _NON_ALNUM.sub(" ", str(text or "").lower().replace("&", " and ")).strip()
+    key = " ".join(NAME_ALIASES.get(w, w) for w in key.split())
+    return KEY_ALIASES.get(key, key)
+
+
+def _trigrams(compact: str) -> set:
+    padded = f"^{compact}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RegionMatch(NamedTuple):
+    kind: str                 # "state" | "district"
+    state: str
+    district: Optional[str]
+    score: float              # 1.0 exact, ~0.9 prefix, else trigram similarity
+
+    @property
+    def name(self) -> str:
+        return self.district if self.kind == "district" else self.state
+
+
+class RegionIndex:
+    """States and districts of one dataset load, with exact, prefix and fuzzy lookup."""
+
+    def __init__(self, districts: Dict[str, Iterable[str]]):
+        # entry i: (kind, state, district)
+        self.entries: List[tuple] = []
+        for state in sorted(districts):
+            self.entries.append(("state", state, None))
+            self.entries.extend(("district", state, d) for d in districts[state])
+        keys = [region_key(d if d else s) for _, s, d in self.entries]
+        self._compact = [k.replace(" ", "") for k in keys]
+        self._lengths = np.array([len(_trigrams(c)) for c in self._compact], dtype=np.float64)
+
+        self._exact: Dict[str, List[int]] = {}
+        prefixes = []
+        grams: Dict[str, List[int]] = {}
+        for i, (key, compact) in enumerate(zip(keys, self._compact)):
+            self._exact.setdefault(compact, []).append(i)
+            words = key.split()
+            for w in range(len(words)):
+                prefixes.append(("".join(words[w:]), i))
+            for g in _trigrams(compact):
+                grams.setdefault(g, []).append(i)
+        prefixes.sort()
+        self._prefix_keys = [p for p, _ in prefixes]
+        self._prefix_ids = [i for _, i in prefixes]
+        self._grams = {g: np.array(ids, dtype=np.int64) for g, ids in grams.items()}
+
+    # ------------------------------ matching -------------------------------
+    def _prefix(self, compact: str) -> List[int]:
+        lo = bisect_left(self._prefix_keys, compact)
+        out = []
+        for j in range(lo, len(self._prefix_keys)):
+            if not self._prefix_keys[j].startswith(compact):
+                break
+            out.append(self._prefix_ids[j])
+        return out
+
+    def _fuzzy(self, compact: str) -> np.ndarray:
+        """Dice similarity of every entry to `compact` (0 where no trigram is shared)."""
+        q = _trigrams(compact)
+        shared = np.zeros(len(self.entries), dtype=np.float64)
+        for g in q:
+            ids = self._grams.get(g)
+            if ids is not None:
+                shared[ids] += 1.0
+        return 2.0 * shared / (len(q) + self._lengths)
+
+    def _scored(self, text: str) -> Dict[int, float]:
+        """entry id -> score for one query string; alternatives separated by '/' are all tried."""
+        scores: Dict[int, float] = {}
+        for part in str(text or "").split("/"):
+            compact = region_key(part).replace(" ", "")
+            if not compact:
+                continue
+            for i in self._exact.get(compact, []):
+                scores[i] = 1.0
+            for i in self._prefix(compact):
+                # shorter names first among prefix hits
+                score = 0.9 - 0.001 * (len(self._compact[i]) - len(compact))
+                if scores.get(i, 0.0) < score:
+                    scores[i] = score
+            if len(compact) >= 3:
+                fuzzy = self._fuzzy(compact)
+                for i in np.flatnonzero(fuzzy >= MIN_SEARCH_SCORE):
+                    s = min(float(fuzzy[i]), 0.85)   # never outranks an exact or prefix hit
+                    if scores.get(int(i), 0.0) < s:
+                        scores[int(i)] = s
+        return scores
+
+    def _match(self, i: int, score: float) -> RegionMatch:
+        kind, state, district = self.entries[i]
+        return RegionMatch(kind, state, district, round(score, 3))
+
+    def search(self, text: str, limit: int = 10, state: Optional[str] = None,
+               kind: Optional[str] = None) -> List[RegionMatch]:
+        """Autocomplete: best matches first, optionally within one state and/or of one kind."""
+        scores = self._scored(text)
+        hits = [(s, i) for i, s in scores.items()
+                if (kind is None or self.entries[i][0] == kind)
+                and (state is None or self.entries[i][1] == state)]
+        hits.sort(key=lambda h: (-h[0], self.entries[h[1]][0] != "state", self._compact[h[1]]))
+        return [self._match(i, s) for s, i in hits[:max(limit, 0)]]
+
+    def _resolve(self, text: str, kind: str, state: Optional[str] = None) -> Optional[RegionMatch]:
+        hits = self.search(text, limit=2, state=state, kind=kind)
+        if not hits:
+            return None
+        best = hits[0]
+        runner_up = hits[1].score if len(hits) > 1 else 0.0
+        if best.score == 1.0 and runner_up < 1.0:
+            return best
+        if best.score >= MIN_FUZZY_SCORE and best.score - runner_up >= MIN_FUZZY_GAP:
+            return best
+        return None
+
+    def resolve_state(self, text: str) -> Optional[str]:
+        """Dataset spelling of a state, or None if unknown / ambiguous."""
+        m = self._resolve(text, "state")
+        return m.state if m else None
+
+    def resolve_district(self, state: Optional[str], text: str) -> Optional[RegionMatch]:
+        """District match within `state` (or anywhere if state is None), or None if unknown / ambiguous."""
+        return self._resolve(text, "district", state)
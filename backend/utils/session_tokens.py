@@ -0,0 +1,130 @@
+# utils/session_tokens.py
+# -----------------------------------------------------------------------------
+# Stateless signed session tokens (auth)
+# -----------------------------------------------------------------------------
+# Format: "v1.<base64url(json claims)>.<base64url(HMAC-SHA256(secret, 'v1.' + claims))>"
+# Claims: uid, email, name, iat, exp, jti. Verifying is one HMAC plus a JSON
+# parse, a few microseconds, with no database lookup and no password hash.
+#
+# Revocation (logout) is a bounded in-memory map of jti -> exp. Entries
+# leave only once the token would have expired anyway; when max_revoked
+# unexpired tokens are already listed, revoke() refuses (returns False)
+# rather than forget one and make it valid again. The map is per process,
+# so under serve.py a logout is only seen by the worker that handled it;
+# keep CROPFIT_TOKEN_TTL_S short if that matters.
+#
+# Tunables (env):
+#   CROPFIT_TOKEN_SECRET  signing key. Without it a random key is made at import:
+#                         it is shared by pre-forked workers but changes on restart,
+#                         which logs everyone out.
+#   CROPFIT_TOKEN_TTL_S   token lifetime in seconds (default 86400)
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+TOKEN_PREFIX = "v1"
+_RANDOM_SECRET = os.urandom(32)  # made at import, i.e. in the master before any fork
+
+
+class TokenError(Exception):
+    """Malformed, forged, expired or revoked token."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    def __init__(self, secret: bytes, ttl_s: int = 86400, max_revoked: int = 10000):
+        self._key = secret
+        self.ttl_s = ttl_s
+        self.max_revoked = max_revoked
+        self._revoked: "OrderedDict[str, int]" = OrderedDict()  # jti -> exp
+        self._lock = threading.Lock()
+
+    def _sign(self, signing_input: bytes) -> str:
+        return _b64encode(hmac.new(self._key, signing_input, hashlib.sha256).digest())
+
+    def issue(self, uid, email: str, name: str = "") -> Tuple[str, int]:
+        """Signed token for a user, plus its expiry (unix seconds)."""
+        now = int(time.time())
+        claims = {"uid": uid, "email": email, "name": name, "iat": now,
+                  "exp": now + self.ttl_s, "jti": secrets.token_urlsafe(12)}
+        body = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = f"{TOKEN_PREFIX}.{body}"
+        return f"{signing_input}.{self._sign(signing_input.encode('ascii'))}", claims["exp"]
+
+    def verify(self, token: str) -> dict:
+        """Claims of a valid token; raises TokenError otherwise."""
+        try:
+            prefix, body, sig = (token or "").split(".")
+            signing_input, sig = f"{prefix}.{body}".encode("ascii"), sig.encode("ascii")
+        except (ValueError, AttributeError):  # includes UnicodeEncodeError (non-ASCII input)
+            raise TokenError("malformed token")
+        if prefix != TOKEN_PREFIX:
+            raise TokenError("unsupported token version")
+        if not hmac.compare_digest(sig, self._sign(signing_input).encode("ascii")):
+            raise TokenError("invalid token signature")
+        try:
+            claims = json.loads(_b64decode(body))
+            exp = int(claims["exp"])
+        except (ValueError, KeyError, TypeError):
+            raise TokenError("malformed token")
+        if exp <= time.time():
+            raise TokenError("token expired")
+        if claims.get("jti") in self._revoked:
+            raise TokenError("token revoked")
+        return claims
+
+    def revoke(self, claims: dict) -> bool:
+        """
+        Reject this token from now on (until it would have expired anyway).
+        False if the revocation list is full of unexpired tokens; the token stays valid.
+        """
+        now = time.time()
+        with self._lock:
+            # insertion order ~ expiry order (fixed TTL), so expired entries sit at the front
+            while self._revoked and next(iter(self._revoked.values())) <= now:
+                self._revoked.popitem(last=False)
+            if len(self._revoked) >= self.max_revoked and claims["jti"] not in self._revoked:
+                # the TTL may have changed between restarts: sweep the whole map once
+                for jti in [j for j, exp in self._revoked.items() if exp <= now]:
+                    del self._revoked[jti]
+                if len(self._revoked) >= self.max_revoked:
+                    print(f"⚠️ Token revocation list full ({self.max_revoked} unexpired); logout refused")
+                    return False
+            self._revoked[claims["jti"]] = int(claims["exp"])
+            return True
+
+
+_SIGNER: Optional[TokenSigner] = None
+_SIGNER_LOCK = threading.Lock()
+
+
+def get_signer() -> TokenSigner:
+    """Process-wide signer configured from the environment."""
+    global _SIGNER
+    if _SIGNER is None:
+        with _SIGNER_LOCK:
+            if _SIGNER is None:
+                secret = os.environ.get("CROPFIT_TOKEN_SECRET", "").encode("utf-8")
+                if not secret:
+                    print("⚠️ CROPFIT_TOKEN_SECRET not set; tokens will not survive a restart")
+                try:
+                    ttl_s = int(os.environ.get("CROPFIT_TOKEN_TTL_S", 86400))
+                except ValueError:
+                    ttl_s = 86400
+                _SIGNER = TokenSigner(secret or _RANDOM_SECRET, ttl_s=max(60, ttl_s))
+    return _SIGNER
@@ -1,24 +1,312 @@
 # utils/weather.py
+# -----------------------------------------------------------------------------
+# OpenWeather client: pooled session, LRU+TTL cache with stale-while-revalidate,
+# and a circuit breaker so a sick upstream can't stall request workers.
+# -----------------------------------------------------------------------------
+# Tunables (env):
+#   OPENWEATHER_BASE_URL     upstream base (point at utils/weather_stub.py for load tests)
+#   WEATHER_TIMEOUT_S        per-request timeout, seconds (default 3)
+#   WEATHER_CACHE_SIZE       max cached cities (default 2048)
+#   WEATHER_TTL_S            fresh lifetime of a cached reading (default 600)
+#   WEATHER_STALE_TTL_S      extra time a stale reading may be served while it refreshes (default 3600)
+#   WEATHER_BREAKER_FAILS    consecutive upstream failures that open the breaker (default 5)
+#   WEATHER_BREAKER_RESET_S  how long the breaker stays open before a trial call (default 30)
+#   WEATHER_HOST_CONCURRENCY max simultaneous upstream calls per host, all callers combined (default 8)
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://api.openweathermap.org"
+WEATHER_PATH = "/data/2.5/weather"
+
+Reading = Tuple[Optional[float], Optional[float]]
+_NO_READING: Reading = (None, None)
+_NEGATIVE_TTL_S = 60.0  # how long an unknown-city answer is remembered
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def normalize_city(city: str) -> str:
+    return " ".join((city or "").strip().lower().split())
+
+
+class UpstreamError(Exception):
+    """Upstream unhealthy (timeout, connection error, 5xx) — counts against the breaker."""
+
+
+class UpstreamBusy(Exception):
+    """Per-host concurrency cap reached; not the upstream's fault."""
+
+
+_HOST_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_HOST_SLOTS_LOCK = threading.Lock()
+
+
+def _host_slots(base_url: str) -> threading.BoundedSemaphore:
+    """Shared per-host semaphore so concurrent callers together respect the cap."""
+    host = urlparse(base_url).netloc
+    with _HOST_SLOTS_LOCK:
+        if host not in _HOST_SLOTS:
+            _HOST_SLOTS[host] = threading.BoundedSemaphore(int(_env_float("WEATHER_HOST_CONCURRENCY", 8)))
+        return _HOST_SLOTS[host]
+
+
+class CircuitBreaker:
+    """closed → open after N consecutive failures → half-open trial after reset_s."""
+
+    def __init__(self, max_failures: int, reset_s: float):
+        self.max_failures = max_failures
+        self.reset_s = reset_s
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._failures < self.max_failures:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_s else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._failures < self.max_failures:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_s or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True  # let exactly one probe through
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.max_failures:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """The probe never reached upstream (e.g. no local slot): let the next call try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class WeatherClient:
+    def __init__(self, base_url: Optional[str] = None, timeout_s: Optional[float] = None,
+                 cache_size: Optional[int] = None, ttl_s: Optional[float] = None,
+                 stale_ttl_s: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                 pool_size: int = 32):
+        self.base_url = (base_url or os.environ.get("OPENWEATHER_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout_s = timeout_s if timeout_s is not None else _env_float("WEATHER_TIMEOUT_S", 3.0)
+        self.cache_size = int(cache_size if cache_size is not None else _env_float("WEATHER_CACHE_SIZE", 2048))
+        self.ttl_s = ttl_s if ttl_s is not None else _env_float("WEATHER_TTL_S", 600.0)
+        self.stale_ttl_s = stale_ttl_s if stale_ttl_s is not None else _env_float("WEATHER_STALE_TTL_S", 3600.0)
+        self.breaker = breaker or CircuitBreaker(
+            int(_env_float("WEATHER_BREAKER_FAILS", 5)), _env_float("WEATHER_BREAKER_RESET_S", 30.0))
+
+        self._host_slots = _host_slots(self.base_url)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # key -> (reading, fetched_at, fresh_for_s)
+        self._cache: "OrderedDict[str, Tuple[Reading, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather-refresh")
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "upstream_calls": 0,
+                      "upstream_errors": 0, "short_circuited": 0}
+
+    # ------------------------------ cache --------------------------------
+    def _cache_get(self, key: str):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key: str, reading: Reading, fresh_for_s: float):
+        with self._lock:
+            self._cache[key] = (reading, time.monotonic(), fresh_for_s)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cached(self, city: str) -> Optional[Reading]:
+        """Cached reading (fresh or stale) without touching the network."""
+        entry = self._cache_get(normalize_city(city))
+        return entry[0] if entry is not None else None
+
+    # ------------------------------ upstream ------------------------------
+    def _fetch(self, city: str, api_key: str) -> Reading:
+        """One upstream call. Raises UpstreamError on transport/5xx problems or a malformed body."""
+        if not self._host_slots.acquire(timeout=self.timeout_s):
+            raise UpstreamBusy(self.base_url)
+        self.stats["upstream_calls"] += 1
+        params = {"q": city, "appid": api_key, "units": "metric"}
+        try:
+            r = self.session.get(self.base_url + WEATHER_PATH, params=params, timeout=self.timeout_s)
+        except requests.RequestException as e:
+            raise UpstreamError(str(e)) from e
+        finally:
+            self._host_slots.release()
+        if r.status_code >= 500 or r.status_code == 429:
+            raise UpstreamError(f"HTTP {r.status_code}")
+        if r.status_code != 200:
+            return _NO_READING  # unknown city / bad key: upstream is healthy, answer is "no data"
+        try:
+            main = (r.json() or {}).get("main", {})
+            temp, hum = main.get("temp", None), main.get("humidity", None)
+            if temp is None or hum is None:
+                return _NO_READING
+            return float(temp), float(hum)
+        except (ValueError, TypeError, AttributeError) as e:  # not JSON / unexpected shape
+            raise UpstreamError(f"malformed response: {e}") from e
+
+    def _refresh(self, key: str, city: str, api_key: str) -> Tuple[Reading, str]:
+        """Fetch and cache one city; returns (reading, status)."""
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            return _NO_READING, "circuit_open"
+        try:
+            reading = self._fetch(city, api_key)
+        except UpstreamBusy:
+            # local back-pressure says nothing about upstream; just free a half-open probe
+            self.breaker.release_trial()
+            self.stats["short_circuited"] += 1
+            return _NO_READING, "busy"
+        except Exception:  # UpstreamError or anything unexpected; every probe records an outcome
+            self.stats["upstream_errors"] += 1
+            self.breaker.record_failure()
+            return _NO_READING, "upstream_error"
+        self.breaker.record_success()
+        found = reading[0] is not None
+        self._cache_put(key, reading, self.ttl_s if found else _NEGATIVE_TTL_S)
+        return reading, ("fetched" if found else "not_found")
+
+    def _refresh_in_background(self, key: str, city: str, api_key: str):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh(key, city, api_key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(run)
+
+    # ------------------------------ public -------------------------------
+    def _lookup(self, city: str, api_key: str) -> Tuple[Reading, str]:
+        key = normalize_city(city)
+        if not key or not api_key:
+            return _NO_READING, "invalid"
+
+        entry = self._cache_get(key)
+        if entry is not None:
+            reading, fetched_at, fresh_for_s = entry
+            age = time.monotonic() - fetched_at
+            status = "cached" if reading[0] is not None else "not_found"
+            if age < fresh_for_s:
+                self.stats["hits"] += 1
+                return reading, status
+            if age < fresh_for_s + self.stale_ttl_s:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(key, city, api_key)
+                return reading, status
+
+        self.stats["misses"] += 1
+        return self._refresh(key, city, api_key)
+
+    def get(self, city: str, api_key: str) -> Reading:
+        """(temp_c, humidity) for a city, or (None, None) if unavailable."""
+        return self._lookup(city, api_key)[0]
+
+    def get_many(self, cities: Iterable[str], api_key: str,
+                 max_workers: int = 16) -> List[Dict[str, object]]:
+        """
+        Resolve many cities concurrently, filling the shared cache.
+        Duplicates (after normalization) are fetched once. One entry per unique
+        city, in first-seen order; failures are reported per city, never raised:
+          {"city", "temperature", "humidity", "status"}
+        status: cached | fetched | not_found | upstream_error | circuit_open | busy | invalid
+        """
+        unique: "OrderedDict[str, str]" = OrderedDict()
+        for c in cities:
+            key = normalize_city(c if isinstance(c, str) else "")
+            if key and key not in unique:
+                unique[key] = c.strip()
+
+        def resolve(city):
+            try:
+                return self._lookup(city, api_key)
+            except Exception:
+                return _NO_READING, "upstream_error"
+
+        names = list(unique.values())
+        if len(names) <= 1:
+            outcomes = [resolve(c) for c in names]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names))),
+                                    thread_name_prefix="weather-bulk") as pool:
+                outcomes = list(pool.map(resolve, names))
+
+        return [{"city": city, "temperature": t, "humidity": h, "status": status}
+                for city, ((t, h), status) in zip(names, outcomes)]
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            size = len(self._cache)
+        return dict(self.stats, cache_size=size, breaker=self.breaker.state)
+
+
+_CLIENT: Optional[WeatherClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> WeatherClient:
+    """Process-wide client (created lazily so env tunables are read at first use)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = WeatherClient()
+    return _CLIENT
+
+
+def get_weather_bulk(cities: Iterable[str], api_key: str, max_workers: int = 16):
+    """Concurrent get_weather for many cities; see WeatherClient.get_many."""
+    return get_client().get_many(cities, api_key, max_workers=max_workers)
+
 
 def get_weather(city: str, api_key: str):
     """
     Returns (temp_c, humidity) for a city using OpenWeather.
-    None, None if anything fails.
+    None, None if anything fails (callers fall back to 25 °C / 60 %).
     """
     try:
-        if not city or not api_key:
-            return None, None
-        url = "https://api.openweathermap.org/data/2.5/weather"
-        params = {"q": city, "appid": api_key, "units": "metric"}
-        r = requests.get(url, params=params, timeout=8)
-        r.raise_for_status()
-        j = r.json()
-        main = j.get("main", {})
-        temp = main.get("temp", None)
-        hum = main.get("humidity", None)
-        if temp is None or hum is None:
-            return None, None
-        return float(temp), float(hum)
+        return get_client().get(city, api_key)
     except Exception:
         return None, None
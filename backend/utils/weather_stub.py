@@ -0,0 +1,96 @@
+# utils/weather_stub.py
+# -----------------------------------------------------------------------------
+# Local stand-in for OpenWeather's /data/2.5/weather so the weather client can
+# be exercised and load-tested without network access.
+#
+#   python -m utils.weather_stub --port 8099 --latency-ms 50 --fail-rate 0.1
+#   OPENWEATHER_BASE_URL=http://127.0.0.1:8099 OPENWEATHER_API_KEY=stub python app.py
+#
+# Readings are deterministic per city. Cities starting with "unknown" get 404.
+# -----------------------------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_reading(city: str):
+    """Stable (temp_c, humidity) for a city name."""
+    h = int(hashlib.md5(city.strip().lower().encode()).hexdigest()[:8], 16)
+    return round(12 + (h % 2400) / 100, 2), 30 + (h // 2400) % 65
+
+
+def make_handler(latency_ms: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    counters = {"requests": 0, "failures": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled sessions are exercised
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                return self._send(200, counters)
+            if url.path != "/data/2.5/weather":
+                return self._send(404, {"cod": "404", "message": "not found"})
+
+            counters["requests"] += 1
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            with rng_lock:
+                failing = rng.random() < fail_rate
+            if failing:
+                counters["failures"] += 1
+                return self._send(503, {"cod": "503", "message": "stub failure"})
+
+            city = (parse_qs(url.query).get("q") or [""])[0]
+            if not city or city.strip().lower().startswith("unknown"):
+                return self._send(404, {"cod": "404", "message": "city not found"})
+            temp, hum = fake_reading(city)
+            return self._send(200, {"name": city, "main": {"temp": temp, "humidity": hum}})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8099, latency_ms: float = 0.0, fail_rate: float = 0.0,
+          seed: int = 0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread and return the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), make_handler(latency_ms, fail_rate, seed))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="weather-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local OpenWeather stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    srv = serve(args.port, args.latency_ms, args.fail_rate, args.seed, args.host)
+    print(f"✅ Weather stub on http://{args.host}:{args.port} (latency={args.latency_ms}ms, fail_rate={args.fail_rate})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,121 @@
+# utils/yield_cube.py
+# -----------------------------------------------------------------------------
+# Precomputed yield aggregates for Objective 3/4 (district-reco, profit-estimate)
+# -----------------------------------------------------------------------------
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# (mean, count, min, max, avg) of Yield_q_per_ha. `mean` is pandas' groupby mean
+# (compensated sum; what district-reco ranks by), `avg` is Series.mean()/np.mean()
+# of the same records in file order (pairwise sum; what the rupee endpoints report).
+# The two can differ in the last bit, which is enough to move a rounded figure.
+YieldStats = Tuple[float, int, float, float, float]
+
+_KEYS = ["State", "District", "Season", "Crop"]
+
+
+def _aggregate(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    agg = (df.groupby(keys, sort=False)["Yield_q_per_ha"]
+             .agg(["mean", "count", "min", "max"])
+             .reset_index())
+    # Highest mean first; ties broken by crop name so top-N lists are stable.
+    return agg.sort_values(["mean", "Crop"], ascending=[False, True], kind="mergesort")
+
+
+class YieldCube:
+    """
+    Materialized mean/count/min/max/avg yield per (State, District, Season, Crop),
+    plus the all-seasons rollup stored under Season=None.
+
+    Built once per dataset load; lookups are plain dict hits. The same
+    aggregates are also kept column-wise in `table` for vectorized passes
+    over many districts at once (profit-matrix), and the row positions
+    behind each key are kept for drawing from the raw yields (profit-risk).
+    The sorted state/district/crop lists behind the region pickers are
+    precomputed too.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.stats: Dict[Tuple[str, str, Optional[str], str], YieldStats] = {}
+        self.ranked: Dict[Tuple[str, str, Optional[str]], List[Tuple[str, YieldStats]]] = {}
+        self.table = pd.DataFrame(columns=_KEYS + ["mean", "count", "avg"])
+        self._yields = np.empty(0, dtype=np.float64)
+        self._positions: Dict[Tuple[str, str, Optional[str], str], np.ndarray] = {}
+        self.states: List[str] = []
+        self.districts: Dict[str, List[str]] = {}
+        self.crops: Dict[Tuple[str, str], List[str]] = {}
+
+        if df is None or df.empty:
+            return
+
+        pairs = df[["State", "District"]].drop_duplicates().sort_values(["State", "District"])
+        for st, dist in pairs.itertuples(index=False):
+            self.districts.setdefault(st, []).append(dist)
+        self.states = sorted(self.districts)
+        for (st, dist), crops in df.groupby(["State", "District"], sort=False)["Crop"]:
+            self.crops[(st, dist)] = sorted({str(c).title() for c in crops.unique()})
+
+        self._yields = df["Yield_q_per_ha"].to_numpy(dtype=np.float64)
+        self._positions = dict(df.groupby(_KEYS, sort=False).indices)
+        for (st, dist, crop), pos in df.groupby(["State", "District", "Crop"], sort=False).indices.items():
+            self._positions[(st, dist, None, crop)] = pos
+
+        avg = {key: float(self._yields[pos].sum() / len(pos)) for key, pos in self._positions.items()}
+        by_season = _aggregate(df, _KEYS)
+        rollup = _aggregate(df, ["State", "District", "Crop"])
+        rollup.insert(2, "Season", None)
+        for part in (by_season, rollup):
+            part["avg"] = [avg[key] for key in part[_KEYS].itertuples(index=False, name=None)]
+        self.table = pd.concat([by_season, rollup], ignore_index=True)[_KEYS + ["mean", "count", "avg"]]
+
+        for part in (by_season, rollup):
+            for st, dist, season, crop, mean, count, lo, hi, a in \
+                    part[_KEYS + ["mean", "count", "min", "max", "avg"]].itertuples(index=False):
+                s: YieldStats = (float(mean), int(count), float(lo), float(hi), float(a))
+                self.stats[(st, dist, season, crop)] = s
+                # rows arrive pre-sorted, so each list is already ranked
+                self.ranked.setdefault((st, dist, season), []).append((crop, s))
+
+    def top_crops(self, state: str, district: str, season: Optional[str] = None,
+                  top_n: int = 5) -> List[Tuple[str, YieldStats]]:
+        """Ranked (crop, stats) by mean yield; empty if no records."""
+        return self.ranked.get((state, district, season or None), [])[:max(top_n, 0)]
+
+    def crop_stats(self, state: str, district: str, crop: str,
+                   season: Optional[str] = None) -> Optional[YieldStats]:
+        """
+        Stats for one crop. If a season is given but has no records,
+        falls back to the all-seasons figure (same as profit-estimate did).
+        """
+        if season:
+            s = self.stats.get((state, district, season, crop))
+            if s is not None:
+                return s
+        return self.stats.get((state, district, None, crop))
+
+    def yield_samples(self, state: str, district: str, crop: str,
+                      season: Optional[str] = None) -> Optional[np.ndarray]:
+        """Per-record yields behind crop_stats (same season fallback); None if no records."""
+        pos = self._positions.get((state, district, season, crop)) if season else None
+        if pos is None:
+            pos = self._positions.get((state, district, None, crop))
+        return None if pos is None else self._yields[pos]
+
+    def district_crops(self, state: str, district: str) -> List[str]:
+        """Sorted Title Case crop names with records in a district."""
+        return self.crops.get((state, district), [])
+
+    def rows(self, state: Optional[str] = None, season: Optional[str] = None) -> pd.DataFrame:
+        """
+        Aggregate rows of one season (None = the all-seasons rollup), for one
+        state or the whole country. Unlike crop_stats there is no fallback:
+        with a season, only crops that have records in it are returned.
+        """
+        t = self.table
+        mask = (t["Season"] == season) if season else t["Season"].isna()
+        if state:
+            mask &= t["State"] == state
+        return t[mask]
@@ -0,0 +1,159 @@
+# utils/yield_forecast.py
+# -----------------------------------------------------------------------------
+# Per-group linear yield trends and next-season forecasts (Objective 3/4)
+# -----------------------------------------------------------------------------
+# Fits yield = a + b·(Year − x0) for every (State, District, Season, Crop)
+# and every all-seasons (State, District, Crop) group at once. One groupby
+# sums n, Σx, Σy, Σx², Σxy, Σy² per group; slope, intercept, R² and the
+# residual error then follow as closed-form NumPy array expressions. There
+# is no Python loop over groups.
+#
+# from_sums() builds the same object from sums computed elsewhere, e.g. by
+# SQL in utils/yield_store.py, for one district at a time.
+#
+# Groups with fewer than MIN_TREND_POINTS distinct years fall back to a flat
+# line at their mean. Forecasts are clipped at zero. The 80% prediction
+# interval uses Student's t (n − 2 degrees of freedom, n − 1 for flat lines);
+# a group with a single record has no interval (lower/upper are NaN).
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MIN_TREND_POINTS = 4
+_KEYS = ["State", "District", "Season", "Crop"]
+# two-sided 80% Student-t quantiles (t_0.90) by degrees of freedom 1..30
+_T80 = np.array([3.078, 1.886, 1.638, 1.533, 1.476, 1.440, 1.415, 1.397, 1.383, 1.372,
+                 1.363, 1.356, 1.350, 1.345, 1.341, 1.337, 1.333, 1.330, 1.328, 1.325,
+                 1.323, 1.321, 1.319, 1.318, 1.316, 1.315, 1.314, 1.313, 1.311, 1.310])
+# past 30, interpolated in 1/dof between the usual table rows (30, 40, 60, 120, inf)
+_T80_TAIL_X = np.array([0.0, 1 / 120, 1 / 60, 1 / 40, 1 / 30])
+_T80_TAIL_T = np.array([1.282, 1.289, 1.296, 1.303, 1.310])
+
+
+def _t80(dof: np.ndarray) -> np.ndarray:
+    """t_0.90 for each dof (NaN where dof < 1: no interval can be given)."""
+    dof = np.asarray(dof, dtype=np.float64)
+    small = _T80[np.clip(dof, 1, 30).astype(np.int64) - 1]
+    tail = np.interp(1.0 / np.maximum(dof, 30.0), _T80_TAIL_X, _T80_TAIL_T)
+    return np.where(dof < 1, np.nan, np.where(dof <= 30, small, tail))
+
+
+class YieldForecast:
+    """Trend fit per yield group; forecast(...) extrapolates `horizon` years past the group's last year."""
+
+    def __init__(self, df: Optional[pd.DataFrame]):
+        sums, x0 = None, 0.0
+        if df is not None and not df.empty and "Year" in df.columns:
+            frame = df[_KEYS + ["Yield_q_per_ha"]].copy()
+            frame["Year"] = pd.to_numeric(df["Year"], errors="coerce")
+            frame = frame.dropna(subset=["Year", "Yield_q_per_ha"])
+            if not frame.empty:
+                x0 = float(frame["Year"].mean())
+                sums = self._group_sums(frame, x0)
+        self._set(sums, x0)
+
+    @classmethod
+    def from_sums(cls, sums: pd.DataFrame, x0: float) -> "YieldForecast":
+        """
+        Build from per-group sums: columns State, District, Season (None = all
+        seasons), Crop, n, x, y, xx, xy, yy, years, last_year, where x = Year - x0.
+        """
+        self = cls.__new__(cls)
+        self._set(sums.set_index(_KEYS) if len(sums) else None, x0)
+        return self
+
+    def _set(self, sums: Optional[pd.DataFrame], x0: float):
+        self.index: Dict[Tuple[str, str, Optional[str], str], int] = {}
+        self.by_district: Dict[Tuple[str, str, Optional[str]], List[Tuple[str, int]]] = {}
+        cols = self._fit(sums, x0) if sums is not None and len(sums) else {}
+        for name in ("n", "years", "last_year", "mean", "mean_x", "slope", "intercept", "x0",
+                     "sxx", "dof", "resid_sd", "r2"):
+            setattr(self, name, cols.get(name, np.empty(0)))
+        self.size = len(cols.get("n", ()))
+
+    # ------------------------------ fitting -------------------------------
+    @staticmethod
+    def _group_sums(frame: pd.DataFrame, x0: float) -> pd.DataFrame:
+        x = frame["Year"].to_numpy(dtype=np.float64) - x0
+        y = frame["Yield_q_per_ha"].to_numpy(dtype=np.float64)
+        terms = pd.DataFrame({"x": x, "y": y, "xx": x * x, "xy": x * y, "yy": y * y, "year": frame["Year"]})
+
+        parts = []
+        rollup = frame[["State", "District", "Crop"]].assign(Season=None)[_KEYS]
+        for key_frame in (frame[_KEYS], rollup):
+            g = terms.groupby([key_frame[k] for k in _KEYS], sort=False, dropna=False)
+            agg = g[["x", "y", "xx", "xy", "yy"]].sum()
+            agg["n"] = g.size()
+            agg["years"] = g["year"].nunique()
+            agg["last_year"] = g["year"].max()
+            parts.append(agg)
+        return pd.concat(parts)
+
+    def _fit(self, agg: pd.DataFrame, x0: float) -> Dict[str, np.ndarray]:
+        keys = agg.index.tolist()
+        n = agg["n"].to_numpy(dtype=np.float64)
+        sx, sy, sxx, sxy, syy = (agg[c].to_numpy(dtype=np.float64) for c in ("x", "y", "xx", "xy", "yy"))
+        Sxx = sxx - sx * sx / n
+        Sxy = sxy - sx * sy / n
+        Syy = syy - sy * sy / n
+        mean_y, mean_x = sy / n, sx / n
+        years = agg["years"].to_numpy()
+
+        trend = (years >= MIN_TREND_POINTS) & (Sxx > 1e-12)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(trend, Sxy / Sxx, 0.0)
+            sse = np.maximum(Syy - slope * Sxy, 0.0)
+            dof = np.where(trend, n - 2, n - 1)
+            resid_sd = np.where(dof > 0, np.sqrt(sse / np.maximum(dof, 1)), np.nan)
+            r2 = np.where(trend & (Syy > 1e-12), 1.0 - sse / Syy, 0.0)
+        intercept = mean_y - slope * mean_x
+
+        for i, (st, dist, season, crop) in enumerate(keys):
+            season = None if season is None or (isinstance(season, float) and np.isnan(season)) else season
+            self.index[(st, dist, season, crop)] = i
+            self.by_district.setdefault((st, dist, season), []).append((crop, i))
+        return {"n": n.astype(np.int64), "years": years.astype(np.int64),
+                "last_year": agg["last_year"].to_numpy(dtype=np.int64), "mean": mean_y,
+                "mean_x": mean_x, "slope": slope, "intercept": intercept, "x0": np.full(len(n), x0),
+                "sxx": np.where(trend, Sxx, np.inf), "dof": dof, "resid_sd": resid_sd, "r2": r2}
+
+    # ------------------------------ queries -------------------------------
+    def _row(self, state, district, crop, season=None) -> Optional[int]:
+        i = self.index.get((state, district, season, crop)) if season else None
+        return self.index.get((state, district, None, crop)) if i is None else i
+
+    def forecast_rows(self, rows: np.ndarray, horizon: int = 1) -> Dict[str, np.ndarray]:
+        """Vectorized forecast for group rows `rows`, `horizon` years after each group's last year."""
+        rows = np.asarray(rows, dtype=np.int64)
+        year = self.last_year[rows] + horizon
+        dx = year - self.x0[rows]
+        point = np.maximum(self.intercept[rows] + self.slope[rows] * dx, 0.0)
+        n = self.n[rows]
+        # flat-line groups have sxx = inf, so only the 1 + 1/n terms remain
+        se = self.resid_sd[rows] * np.sqrt(1.0 + 1.0 / n + (dx - self.mean_x[rows]) ** 2 / self.sxx[rows])
+        half = _t80(self.dof[rows]) * se
+        return {"year": year, "forecast": point,
+                "lower": np.maximum(point - half, 0.0), "upper": point + half,
+                "slope": self.slope[rows], "r2": self.r2[rows], "mean": self.mean[rows],
+                "n": n, "years": self.years[rows], "last_year": self.last_year[rows]}
+
+    def forecast(self, state: str, district: str, crop: str, season: Optional[str] = None,
+                 horizon: int = 1) -> Optional[dict]:
+        """Forecast for one crop (same season fallback as YieldCube.crop_stats); None if no records."""
+        i = self._row(state, district, crop, season)
+        if i is None:
+            return None
+        return {k: v[0].item() for k, v in self.forecast_rows(np.array([i]), horizon).items()}
+
+    def district(self, state: str, district: str, season: Optional[str] = None,
+                 horizon: int = 1) -> List[Tuple[str, dict]]:
+        """(crop, forecast) for every crop of a district/season, highest forecast first."""
+        entries = self.by_district.get((state, district, season or None), [])
+        if not entries:
+            return []
+        crops = [c for c, _ in entries]
+        fc = self.forecast_rows(np.array([i for _, i in entries]), horizon)
+        order = sorted(range(len(crops)), key=lambda j: (-fc["forecast"][j], crops[j]))
+        return [(crops[j], {k: v[j].item() for k, v in fc.items()}) for j in order]
@@ -0,0 +1,297 @@
+# utils/yield_store.py
+# -----------------------------------------------------------------------------
+# On-disk yield store for Objective 3/4 (CROPFIT_YIELD_BACKEND=sqlite)
+# -----------------------------------------------------------------------------
+# YieldCube and YieldForecast keep every district record in memory. That is
+# fine for the shipped CSV but not for nationwide multi-year data (see
+# generate_full_district_dataset.py). SQLiteYieldCube and SQLiteYieldForecast
+# answer the same calls from a SQLite file instead. Each filter, ranking
+# and aggregation runs as an indexed query, so process memory stays roughly
+# constant however many rows the dataset has. Only the state/district lists
+# are held in memory, for the region pickers and RegionIndex.
+#
+# build_yield_db() converts the CSV in chunks of `chunk_rows` rows:
+#   yields(State, District, Season, Crop, Year, Yield)
+#       raw records; a covering index on (State, District, Season, Crop, Year, Yield)
+#   agg(State, District, Season, Crop, mean, count, min, max, avg)
+#       precomputed stats (see YieldStats); Season NULL holds the all-seasons rollup
+#   meta(key, value)
+#       source CSV fingerprint, schema version, mean Year
+# The file is written next to its final path and then os.replace()d into
+# place, so readers never see a half-built DB. If the CSV's size and mtime
+# match the fingerprint, the existing DB is reused and no rebuild happens.
+#
+# Reads use a read-only SQLitePool: one connection per thread and per process.
+
+import os
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.db_pool import SQLitePool
+from utils.yield_cube import YieldStats
+from utils.yield_forecast import YieldForecast
+
+SCHEMA_VERSION = "2"
+_KEYS = ["State", "District", "Season", "Crop"]
+
+_SCHEMA = """
+CREATE TABLE yields (State TEXT NOT NULL, District TEXT NOT NULL, Season TEXT NOT NULL,
+                     Crop TEXT NOT NULL, Year INTEGER, Yield REAL NOT NULL);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_INDEXES = """
+CREATE TABLE agg AS
+    SELECT State, District, Season, Crop, kahan_avg(Yield) AS mean, COUNT(*) AS count,
+           MIN(Yield) AS min, MAX(Yield) AS max, pairwise_avg(Yield) AS avg
+      FROM (SELECT * FROM yields ORDER BY State, District, Season, Crop, rowid)
+     GROUP BY State, District, Season, Crop;
+INSERT INTO agg
+    SELECT State, District, NULL, Crop, kahan_avg(Yield), COUNT(*), MIN(Yield), MAX(Yield),
+           pairwise_avg(Yield)
+      FROM (SELECT * FROM yields ORDER BY State, District, Crop, rowid)
+     GROUP BY State, District, Crop;
+CREATE INDEX ix_yields_key ON yields (State, District, Season, Crop, Year, Yield);
+CREATE INDEX ix_agg_rank ON agg (State, District, Season, mean DESC, Crop);
+CREATE INDEX ix_agg_season ON agg (Season, State);
+ANALYZE;
+"""
+
+
+class _KahanSum:
+    """
+    SUM() with the compensated summation pandas' groupby sum/mean use, fed in
+    file order. Plain SUM can differ in the last bit, which flips
+    round(mean, 2) on the many means that fall exactly on a half cent (27.725).
+    """
+
+    def __init__(self):
+        self.total = self.comp = 0.0
+        self.n = 0
+
+    def step(self, value):
+        if value is not None:
+            y = value - self.comp
+            t = self.total + y
+            self.comp = t - self.total - y
+            self.total = t
+            self.n += 1
+
+    def finalize(self):
+        return self.total if self.n else None
+
+
+class _KahanAvg(_KahanSum):
+    def finalize(self):
+        return self.total / self.n if self.n else None
+
+
+class _PairwiseAvg:
+    """AVG() as Series.mean()/np.mean() compute it: numpy's pairwise sum over the values fed in."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        if not self.values:
+            return None
+        return float(np.asarray(self.values, dtype=np.float64).sum() / len(self.values))
+
+
+def _register_functions(conn: sqlite3.Connection):
+    conn.create_aggregate("kahan_sum", 1, _KahanSum)
+    conn.create_aggregate("kahan_avg", 1, _KahanAvg)
+    conn.create_aggregate("pairwise_avg", 1, _PairwiseAvg)
+
+
+def _fingerprint(csv_path: str) -> str:
+    st = os.stat(csv_path)
+    return f"{SCHEMA_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _stored_fingerprint(db_path: str) -> Optional[str]:
+    if not os.path.exists(db_path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def build_yield_db(csv_path: str, db_path: str, clean: Callable[[pd.DataFrame], pd.DataFrame],
+                   chunk_rows: int = 250_000) -> bool:
+    """
+    (Re)build `db_path` from `csv_path` unless it is already current.
+    `clean` is applied to each chunk (same cleaning as the in-memory load).
+    Returns True if the DB was rebuilt.
+    """
+    fingerprint = _fingerprint(csv_path)
+    if _stored_fingerprint(db_path) == fingerprint:
+        return False
+
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # scratch file until the rename below: no journal, no fsyncs
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -65536")
+        _register_functions(conn)
+        conn.executescript(_SCHEMA)
+        rows, year_sum, year_n = 0, 0.0, 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            df = clean(chunk)
+            if df.empty:
+                continue
+            year = pd.to_numeric(df["Year"], errors="coerce") if "Year" in df.columns \
+                else pd.Series(np.nan, index=df.index)
+            year_sum += float(year.sum())
+            year_n += int(year.notna().sum())
+            out = pd.DataFrame({k: df[k].astype(str) for k in _KEYS})
+            out["Year"] = year.astype("Int64").astype(object).where(year.notna(), None)
+            out["Yield"] = df["Yield_q_per_ha"].astype(np.float64)
+            conn.executemany("INSERT INTO yields VALUES (?, ?, ?, ?, ?, ?)",
+                             out.itertuples(index=False, name=None))
+            rows += len(out)
+        conn.executescript(_INDEXES)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("source", fingerprint), ("rows", str(rows)),
+            ("x0", repr(year_sum / year_n if year_n else 0.0)),
+        ])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return True
+
+
+class SQLiteYieldCube:
+    """YieldCube's query interface over a DB written by build_yield_db()."""
+
+    def __init__(self, db_path: str):
+        self.path = db_path
+        self._pool = SQLitePool(db_path, read_only=True, on_connect=_register_functions)
+        conn = self._pool.connection()
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        self.size = int(meta.get("rows", 0))
+        self.x0 = float(meta.get("x0", 0.0))
+        self.districts: Dict[str, List[str]] = {}
+        for st, dist in conn.execute(
+                "SELECT DISTINCT State, District FROM yields ORDER BY State, District"):
+            self.districts.setdefault(st, []).append(dist)
+        self.states: List[str] = sorted(self.districts)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return self._pool.connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _stats(row) -> YieldStats:
+        return (float(row["mean"]), int(row["count"]), float(row["min"]), float(row["max"]), float(row["avg"]))
+
+    def top_crops(self, state: str, district: str, season: Optional[str] = None,
+                  top_n: int = 5) -> List[Tuple[str, YieldStats]]:
+        """Ranked (crop, stats) by mean yield; empty if no records."""
+        rows = self._query(
+            "SELECT Crop, mean, count, min, max, avg FROM agg WHERE State = ? AND District = ? AND Season IS ?"
+            " ORDER BY mean DESC, Crop LIMIT ?", (state, district, season or None, max(top_n, 0)))
+        return [(r["Crop"], self._stats(r)) for r in rows]
+
+    def crop_stats(self, state: str, district: str, crop: str,
+                   season: Optional[str] = None) -> Optional[YieldStats]:
+        """Stats for one crop, falling back to all seasons like YieldCube.crop_stats."""
+        for s in ((season, None) if season else (None,)):
+            rows = self._query(
+                "SELECT mean, count, min, max, avg FROM agg WHERE State = ? AND District = ? AND Season IS ?"
+                " AND Crop = ?", (state, district, s, crop))
+            if rows:
+                return self._stats(rows[0])
+        return None
+
+    def yield_samples(self, state: str, district: str, crop: str,
+                      season: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Per-record yields behind crop_stats (same season fallback); None if no
+        records. Rows come back in file order, as YieldCube returns them, so
+        seeded profit-risk draws agree across backends.
+        """
+        conn = self._pool.connection()
+        for s in ((season, None) if season else (None,)):
+            cur = conn.execute("SELECT Yield FROM yields WHERE State = ? AND District = ? AND Crop = ?"
+                               + (" AND Season = ?" if s else "") + " ORDER BY rowid",
+                               (state, district, crop) + ((s,) if s else ()))
+            out = np.fromiter((r[0] for r in cur), dtype=np.float64)
+            if len(out):
+                return out
+        return None
+
+    def rows(self, state: Optional[str] = None, season: Optional[str] = None) -> pd.DataFrame:
+        """Aggregate rows of one season (None = all-seasons rollup), no fallback; see YieldCube.rows."""
+        sql = f"SELECT {', '.join(_KEYS)}, mean, count, avg FROM agg WHERE Season IS ?"
+        params: tuple = (season or None,)
+        if state:
+            sql += " AND State = ?"
+            params += (state,)
+        rows = self._query(sql + " ORDER BY mean DESC, Crop, State, District", params)
+        return pd.DataFrame([tuple(r) for r in rows], columns=_KEYS + ["mean", "count", "avg"])
+
+    def district_crops(self, state: str, district: str) -> List[str]:
+        """Sorted Title Case crop names with records in a district."""
+        rows = self._query("SELECT DISTINCT Crop FROM agg WHERE State = ? AND District = ? AND Season IS NULL",
+                           (state, district))
+        return sorted({str(r[0]).title() for r in rows})
+
+    # ------------------------------ forecasts ------------------------------
+    def group_sums(self, state: str, district: str, season: Optional[str] = None,
+                   crop: Optional[str] = None) -> pd.DataFrame:
+        """YieldForecast.from_sums() input for one district (one season, or the rollup)."""
+        sql = ("SELECT State, District, {season} AS Season, Crop, COUNT(*) AS n,"
+               " kahan_sum(Year - :x0) AS x, kahan_sum(Yield) AS y, kahan_sum((Year - :x0) * (Year - :x0)) AS xx,"
+               " kahan_sum((Year - :x0) * Yield) AS xy, kahan_sum(Yield * Yield) AS yy,"
+               " COUNT(DISTINCT Year) AS years, MAX(Year) AS last_year"
+               " FROM (SELECT * FROM yields WHERE State = :state AND District = :district"
+               " AND Year IS NOT NULL{filters} ORDER BY rowid)")
+        params = {"x0": self.x0, "state": state, "district": district, "season": season, "crop": crop}
+        filters = (" AND Season = :season" if season else "") + (" AND Crop = :crop" if crop else "")
+        sql = sql.format(season="Season" if season else "NULL", filters=filters)
+        rows = self._query(sql + " GROUP BY Crop", params)
+        cols = _KEYS + ["n", "x", "y", "xx", "xy", "yy", "years", "last_year"]
+        return pd.DataFrame([tuple(r) for r in rows], columns=cols)
+
+
+class SQLiteYieldForecast:
+    """YieldForecast's lookups, fitting one district's groups per call from SQL sums."""
+
+    def __init__(self, cube: SQLiteYieldCube):
+        self.cube = cube
+
+    def forecast(self, state: str, district: str, crop: str, season: Optional[str] = None,
+                 horizon: int = 1) -> Optional[dict]:
+        """Same as YieldForecast.forecast (season first, then all seasons)."""
+        for s in ((season, None) if season else (None,)):
+            sums = self.cube.group_sums(state, district, s, crop)
+            if len(sums):
+                return YieldForecast.from_sums(sums, self.cube.x0).forecast(state, district, crop, s, horizon)
+        return None
+
+    def district(self, state: str, district: str, season: Optional[str] = None,
+                 horizon: int = 1) -> List[Tuple[str, dict]]:
+        """Same as YieldForecast.district: every crop of one district, best forecast first."""
+        sums = self.cube.group_sums(state, district, season)
+        return YieldForecast.from_sums(sums, self.cube.x0).district(state, district, season, horizon)
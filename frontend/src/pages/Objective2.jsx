@@ -49,11 +49,8 @@ export default function Objective2() {
     setError("");
     setPlan(null);
     try {
-      const res = await fetch(`${API_BASE}/cycle-plan`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(form),
-      });
+      // GET so the browser can revalidate the plan with its ETag (304) instead of re-downloading it
+      const res = await fetch(`${API_BASE}/cycle-plan?${new URLSearchParams(form)}`);
       const txt = await res.text();
       let data;
       try { data = JSON.parse(txt); } catch { throw new Error("Invalid JSON from server"); }